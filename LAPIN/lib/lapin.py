@@ -7,19 +7,351 @@ Langage d'Apprentissage de la Programmation INtutive
 import sys
 import os
 import re
+import io
+import copy
 import math
+import time
 import random
+import csv
 import json
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from lapin_stdlib import LapinStdLib
+
+
+class RetourFonction(Exception):
+    """Signal interne levé par `retourner` pour sortir d'une fonction"""
+
+    def __init__(self, valeur):
+        super().__init__("'retourner' utilisé hors d'une fonction")
+        self.valeur = valeur
+
+
+class CacheLRU:
+    """Cache borné des résultats de fonctions pures, avec statistiques"""
+
+    def __init__(self, taille_max=1024):
+        self.taille_max = taille_max
+        self.entrees = OrderedDict()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def obtenir(self, cle):
+        """Retourne (trouvé, valeur) et marque l'entrée comme récente"""
+        try:
+            valeur = self.entrees[cle]
+        except KeyError:
+            self.echecs += 1
+            return False, None
+        self.entrees.move_to_end(cle)
+        self.succes += 1
+        return True, valeur
+
+    def stocker(self, cle, valeur):
+        if self.taille_max <= 0:
+            return
+        self.entrees[cle] = valeur
+        self.entrees.move_to_end(cle)
+        if len(self.entrees) > self.taille_max:
+            self.entrees.popitem(last=False)
+            self.evictions += 1
+
+    def vider(self):
+        self.entrees.clear()
+
+    def statistiques(self):
+        total = self.succes + self.echecs
+        return {
+            'taille': len(self.entrees),
+            'taille_max': self.taille_max,
+            'succes': self.succes,
+            'echecs': self.echecs,
+            'evictions': self.evictions,
+            'taux_succes': self.succes / total if total else 0.0,
+        }
+
+class StructureLapin:
+    """Base des instances de `structure` : un emplacement fixe par champ"""
+
+    __slots__ = ()
+    champs = ()
+
+    def __init__(self, *valeurs):
+        if len(valeurs) != len(self.champs):
+            raise Exception(f"'{type(self).__name__}' attend {len(self.champs)} valeurs, "
+                            f"{len(valeurs)} reçues")
+        for emplacement, valeur in zip(self.emplacements, valeurs):
+            emplacement.__set__(self, valeur)
+
+    def __eq__(self, autre):
+        return type(self) is type(autre) and all(
+            emplacement.__get__(self) == emplacement.__get__(autre)
+            for emplacement in self.emplacements
+        )
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Les classes sont créées à la volée : on transmet leur description
+        valeurs = tuple(emplacement.__get__(self) for emplacement in self.emplacements)
+        return (_recreer_structure, (type(self).__name__, self.champs, valeurs))
+
+    def __repr__(self):
+        valeurs = ', '.join(f"{champ}={getattr(self, champ)!r}" for champ in self.champs)
+        return f"{type(self).__name__}({valeurs})"
+
+    __str__ = __repr__
+
+
+_CLASSES_STRUCTURES = {}
+
+
+def creer_structure(nom, champs):
+    """Classe à emplacements fixes d'une `structure`, partagée entre interpréteurs"""
+    champs = tuple(champs)
+    cls = _CLASSES_STRUCTURES.get((nom, champs))
+    if cls is None:
+        cls = type(nom, (StructureLapin,), {'__slots__': champs, 'champs': champs})
+        # Descripteurs des emplacements : l'accès à un champ est un décalage fixe
+        cls.emplacements = tuple(cls.__dict__[champ] for champ in champs)
+        cls.index = {champ: emplacement for champ, emplacement in zip(champs, cls.emplacements)}
+        cls = _CLASSES_STRUCTURES.setdefault((nom, champs), cls)
+    return cls
+
+
+def _recreer_structure(nom, champs, valeurs):
+    return creer_structure(nom, champs)(*valeurs)
+
+
+class CacheCode:
+    """Structure des blocs et sources déjà analysées, partageable entre exécutions
+
+    Chaque bloc (`si`, boucles, `fonction`) n'est découpé qu'une fois par
+    séquence de lignes : les corps obtenus sont des tuples, eux-mêmes
+    réutilisés comme clés pour les blocs imbriqués. Les entrées ne sont
+    jamais modifiées après leur création.
+
+    Les corps de fonctions sont aussi retrouvés par leur contenu : quand un
+    fichier modifié est relu, ses fonctions inchangées reprennent leur
+    ancien corps et tous les blocs déjà découpés à l'intérieur.
+    """
+
+    ENTETES = ('fonction ', 'si ', 'tant que ', 'repeter ', 'pour chaque ')
+
+    def __init__(self, taille_max=10000):
+        self.taille_max = taille_max
+        self.blocs = {}
+        self.fichiers = {}
+        self.fonctions = {}
+        self.analyses = 0
+
+    def lire_fichier(self, filepath):
+        """Lignes d'un fichier source, relues seulement s'il a changé"""
+        mtime = os.path.getmtime(filepath)
+        entree = self.fichiers.get(filepath)
+        if entree is not None and entree[0] == mtime:
+            return entree[1]
+
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = tuple(f.read().split('\n'))
+
+        self.fichiers[filepath] = (mtime, lines)
+        if entree is not None:
+            # La nouvelle version reprend les corps de fonctions inchangés,
+            # puis ce que seule l'ancienne version utilisait est retiré
+            self.analyser(lines)
+            self.elaguer(entree[1])
+        return lines
+
+    def analyser(self, lines):
+        """Découpe à l'avance tous les blocs de `lines`, imbriqués compris"""
+        i = 0
+        while i < len(lines):
+            if lines[i].strip().startswith(self.ENTETES):
+                corps, sinon, _, fin = self.decouper(lines, i)
+                self.analyser(corps)
+                self.analyser(sinon)
+                i = fin + 1
+            else:
+                i += 1
+
+    def elaguer(self, ancien):
+        """Retire les blocs et corps de fonctions qui ne servaient qu'à `ancien`
+
+        Les séquences de premier niveau (fichiers, programmes) sont celles
+        qu'aucun bloc ne contient ; tout ce qui n'est plus atteignable depuis
+        elles, hormis `ancien`, est retiré.
+        """
+        entrees = list(self.blocs.items())
+        contenus = {}
+        for (ident, _), (_, (corps, sinon, _, _)) in entrees:
+            contenus.setdefault(ident, []).extend((corps, sinon))
+        imbriques = {id(sequence) for sequences in contenus.values() for sequence in sequences}
+
+        a_visiter = [ident for ident in contenus if ident not in imbriques and ident != id(ancien)]
+        atteints = set()
+        while a_visiter:
+            ident = a_visiter.pop()
+            if ident not in atteints:
+                atteints.add(ident)
+                a_visiter.extend(id(sequence) for sequence in contenus.get(ident, ()))
+
+        for cle, _ in entrees:
+            if cle[0] not in atteints:
+                self.blocs.pop(cle, None)
+        for corps in list(self.fonctions):
+            if id(corps) not in atteints:
+                self.fonctions.pop(corps, None)
+
+    def decouper(self, lines, start_idx):
+        """Retourne (corps, sinon, index_sinon, index_fin) du bloc ouvert en `start_idx`
+
+        Pour un bloc `si`, `corps` s'arrête au `sinon` de même niveau et
+        `sinon` contient la suite. `index_fin` vaut len(lines) si le bloc
+        n'est pas fermé.
+        """
+        cle = (id(lines), start_idx)
+        entree = self.blocs.get(cle)
+        if entree is not None and entree[0] is lines:
+            return entree[1]
+
+        i = start_idx + 1
+        else_idx = None
+        depth = 1
+        is_if = lines[start_idx].strip().startswith('si ')
+
+        while i < len(lines):
+            line = lines[i].strip()
+            if line.startswith(self.ENTETES):
+                depth += 1
+            elif line == 'sinon' and depth == 1 and is_if and else_idx is None:
+                else_idx = i
+            elif line == 'fin':
+                depth -= 1
+                if depth == 0:
+                    break
+            i += 1
+
+        if else_idx is None:
+            corps = tuple(line.strip() for line in lines[start_idx + 1:i])
+            sinon = ()
+            else_idx = i
+        else:
+            corps = tuple(line.strip() for line in lines[start_idx + 1:else_idx])
+            sinon = tuple(line.strip() for line in lines[else_idx + 1:i])
+
+        if lines[start_idx].strip().startswith('fonction '):
+            corps = self.fonctions.setdefault(corps, corps)
+
+        self.analyses += 1
+        resultat = (corps, sinon, else_idx + 1, i)
+        if len(self.blocs) >= self.taille_max:
+            self.blocs.clear()
+            self.fonctions.clear()
+        # La référence à `lines` garde son id valide tant que l'entrée existe
+        self.blocs[cle] = (lines, resultat)
+        return resultat
+
+
 class LapinInterpreter:
-    def __init__(self, debug=False):
+    # Fonctions intégrées qui lisent ou écrivent hors du programme, ou
+    # modifient leurs arguments : une fonction qui les appelle n'est pas pure
+    BUILTINS_IMPURS = {
+        'afficher', 'ecrire', 'lire', 'lire_nombre', 'ajouter',
+        'nombre_aleatoire', 'maintenant', 'inclure', 'charger',
+    }
+
+    MOTS_CLES = {
+        'si', 'alors', 'sinon', 'fin', 'tant', 'que', 'repeter', 'fois',
+        'pour', 'chaque', 'dans', 'et', 'ou', 'vrai', 'faux', 'retourner',
+    }
+
+    NOMBRE = re.compile(r'^-?\d+(\.\d+)?$')
+    APPEL = re.compile(r'^(\w+)\((.*)\)$')
+    CHAMP = re.compile(r'^(\w+)\.(\w+)$')
+
+    COMPARAISONS = (
+        (' ou ', lambda a, b: a or b),
+        (' et ', lambda a, b: a and b),
+        (' == ', lambda a, b: a == b),
+        (' != ', lambda a, b: a != b),
+        (' < ', lambda a, b: a < b),
+        (' <= ', lambda a, b: a <= b),
+        (' > ', lambda a, b: a > b),
+        (' >= ', lambda a, b: a >= b),
+    )
+
+    # Niveaux de priorité arithmétique, du plus faible au plus fort, et
+    # coupure au premier opérateur du niveau (associativité à droite)
+    NIVEAUX = (('+', False), ('-', False), ('*/%', False), ('^', True))
+
+    OPERATIONS = {
+        '+': lambda a, b: a + b,
+        '-': lambda a, b: a - b,
+        '*': lambda a, b: a * b,
+        '/': lambda a, b: a / b if b != 0 else 0,
+        '%': lambda a, b: a % b,
+        '^': lambda a, b: a ** b,
+    }
+
+    # En dessous de ce nombre d'éléments, une boucle parallèle tourne sur place
+    SEUIL_PARALLELE = 256
+
+    def __init__(self, debug=False, taille_cache=1024, processus=None,
+                 code=None, dossier_inclusion=None):
         self.variables = {}
         self.functions = {}
+        self.structures = {}
         self.output = []
         self.debug_mode = debug
         self.current_line = 0
+        self.current_file = None
         self.call_stack = []
+        self.derniere_erreur = None
+        self.fichiers_inclus = []
+
+        # Code analysé (blocs, fichiers inclus) : propre à l'interpréteur
+        # ou partagé avec d'autres via un Programme ou un Executeur
+        self.code = code if code is not None else CacheCode()
+        if dossier_inclusion is None:
+            dossier_inclusion = os.path.dirname(sys.argv[0])
+        self.dossier_inclusion = dossier_inclusion
+        self.aleatoire = random.Random()
+
+        # Entrées/sorties : `lire` appelle lire_ligne(), les textes affichés
+        # sont aussi écrits dans `sortie` (objet avec .write) si elle est définie
+        self.lire_ligne = input
+        self.sortie = None
+
+        # Point d'accroche du débogueur : appelé avant chaque instruction
+        # ('ligne', numéro), à l'entrée ('appel', nom) et à la sortie
+        # ('retour', nom) de chaque fonction. Laissé à None, il ne coûte
+        # qu'un test par ligne.
+        self.trace_hook = None
+
+        # Accroche d'observation (profileur mémoire) : mêmes évènements, mais
+        # le cache et les boucles parallèles restent actifs, comme sans elle
+        self.observateur = None
+
+        # Couverture : objet avec `enregistrer(fichier, lignes)` et des
+        # tables `lignes` / `branches` (un bytearray par fichier, indexé par
+        # numéro de ligne), remplies directement sans rappel par ligne
+        self.couverture = None
+
+        # Mémoïsation des fonctions pures
+        self.cache = CacheLRU(taille_cache)
+        self.purete = {}
+
+        # Nombre de processus des boucles parallèles (None : un par cœur) et
+        # groupe de processus gardé jusqu'à la fin de `execute`
+        self.processus = processus
+        self._groupe = None
+        self._groupe_empreinte = None
 
         # Fonctions intégrées
         self.builtins = {
@@ -30,75 +362,156 @@ class LapinInterpreter:
             'longueur': self.func_longueur,
             'liste': self.func_liste,
             'ajouter': self.func_ajouter,
+            'charger': self.func_charger,
             'nombre_aleatoire': self.func_nombre_aleatoire,
             'maintenant': self.func_maintenant,
             'texte_en_nombre': self.func_texte_en_nombre,
             'nombre_en_texte': self.func_nombre_en_texte,
             'arrondir': self.func_arrondir,
             'absolu': self.func_absolu,
+            'trier': self.func_trier,
+            'recherche_dichotomique': LapinStdLib.recherche_dichotomique,
+            'index_de': LapinStdLib.index_de,
+            'contient': LapinStdLib.contient,
+            'compter': LapinStdLib.compter,
+            'unique': LapinStdLib.unique,
+            'union': LapinStdLib.union,
+            'intersection': LapinStdLib.intersection,
         }
 
+    def emit(self, texte):
+        """Ajoute une ligne à la sortie du programme"""
+        self.output.append(texte)
+        if self.sortie is not None:
+            self.sortie.write(texte + '\n')
+
+    def write(self, texte):
+        """Écrit du texte sans saut de ligne"""
+        if self.sortie is not None:
+            self.sortie.write(texte)
+        else:
+            print(texte, end='', flush=True)
+
     def log_debug(self, message):
         if self.debug_mode:
             print(f"[DEBUG] {message}")
 
     def execute(self, code, filename="<inline>"):
-        """Exécute le code LAPIN"""
+        """Exécute le code LAPIN (texte ou séquence de lignes déjà découpée)"""
+        old_file = self.current_file
         try:
-            lines = code.split('\n')
+            lines = code.split('\n') if isinstance(code, str) else code
             self.output = []
+            self.derniere_erreur = None
+            self.current_file = filename
+            if self.couverture is not None:
+                self.couverture.enregistrer(filename, lines)
 
-            i = 0
-            while i < len(lines):
-                self.current_line = i + 1
-                line = lines[i].rstrip()
-
-                # Ignorer les lignes vides et commentaires
-                if not line or line.strip().startswith('#'):
-                    i += 1
-                    continue
-
-                # Traitement spécial pour blocs
-                if line.strip().startswith('fonction '):
-                    i = self.process_function(lines, i)
-                    continue
-                elif line.strip().startswith('si '):
-                    i = self.process_if(lines, i)
-                    continue
-                elif line.strip().startswith('tant que '):
-                    i = self.process_while(lines, i)
-                    continue
-                elif line.strip().startswith('repeter '):
-                    i = self.process_repeat(lines, i)
-                    continue
-                elif line.strip().startswith('pour chaque '):
-                    i = self.process_foreach(lines, i)
-                    continue
-
-                # Exécuter une ligne simple
-                result = self.execute_line(line.strip())
-                if result is not None:
-                    self.output.append(str(result))
-
-                i += 1
+            self.execute_block(lines, 0, afficher_resultats=True)
 
             return True
 
         except Exception as e:
-            error_msg = f"❌ ERREUR ligne {self.current_line}: {str(e)}"
-            self.output.append(error_msg)
+            fichier, ligne = self.emplacement_erreur(e)
+            self.derniere_erreur = {
+                'fichier': fichier,
+                'ligne': ligne,
+                'message': str(e),
+            }
+            if fichier != filename:
+                self.emit(f"❌ ERREUR {fichier} ligne {ligne}: {str(e)}")
+            else:
+                self.emit(f"❌ ERREUR ligne {ligne}: {str(e)}")
             if self.debug_mode:
                 import traceback
                 traceback.print_exc()
             return False
+        finally:
+            self.current_file = old_file
+            self.fermer_groupe()
+
+    def emplacement_erreur(self, erreur):
+        """(fichier, ligne) où `erreur` a été levée
+
+        `call_function` et `include_file` restaurent la ligne courante en
+        remontant : l'emplacement d'origine est noté sur l'exception avant.
+        """
+        emplacement = getattr(erreur, 'emplacement', None)
+        if emplacement is None:
+            emplacement = (self.current_file, self.current_line)
+        return emplacement
+
+    def execute_block(self, lines, offset=0, afficher_resultats=False):
+        """Exécute un bloc de lignes (programme, corps de fonction ou de boucle)
+
+        `offset` est l'index de la première ligne du bloc dans le fichier,
+        ce qui permet de garder des numéros de ligne exacts dans les blocs
+        imbriqués. Au niveau principal, les résultats des appels sont
+        affichés. Retourne le dernier résultat non nul du bloc.
+        """
+        result = None
+        executees = None
+        if self.couverture is not None:
+            executees = self.couverture.lignes.get(self.current_file)
+
+        i = 0
+        while i < len(lines):
+            self.current_line = offset + i + 1
+            line = lines[i].strip()
+
+            # Ignorer les lignes vides et commentaires
+            if not line or line.startswith('#'):
+                i += 1
+                continue
+
+            if executees is not None:
+                executees[self.current_line] = 1
+            if self.trace_hook is not None:
+                self.trace_hook('ligne', self.current_line)
+            if self.observateur is not None:
+                self.observateur('ligne', self.current_line)
+
+            # Traitement spécial pour blocs
+            if line.startswith('fonction '):
+                i = self.process_function(lines, i, offset)
+                continue
+            elif line.startswith('si '):
+                i = self.process_if(lines, i, offset)
+                continue
+            elif line.startswith('tant que '):
+                i = self.process_while(lines, i, offset)
+                continue
+            elif line.startswith('repeter '):
+                i = self.process_repeat(lines, i, offset)
+                continue
+            elif line.startswith('pour chaque '):
+                i = self.process_foreach(lines, i, offset)
+                continue
+
+            # Exécuter une ligne simple
+            line_result = self.execute_line(line)
+            if line_result is not None:
+                result = line_result
+                if afficher_resultats:
+                    self.emit(str(line_result))
+
+            i += 1
+
+        return result
 
     def execute_line(self, line):
         """Exécute une seule ligne de code"""
         self.log_debug(f"Exécution: {line}")
 
+        # RETOURNER
+        if line == 'retourner' or line.startswith('retourner '):
+            expression = line[9:].strip()
+            raise RetourFonction(self.evaluate_expression(expression) if expression else None)
+
         # AFFICHER / ÉCRIRE
-        if line.startswith('afficher '):
-            return self.cmd_afficher(line[9:])
+        elif line.startswith('afficher '):
+            self.emit(self.cmd_afficher(line[9:]))
+            return None
         elif line.startswith('ecrire '):
             return self.cmd_ecrire(line[7:])
 
@@ -114,13 +527,23 @@ class LapinInterpreter:
             self.variables[var_name] = value
             return None
 
+        # STRUCTURE
+        elif line.startswith('structure '):
+            self.define_structure(line)
+            return None
+
         # AFFECTATION
         elif ' = ' in line:
             parts = line.split(' = ', 1)
             var_name = parts[0].strip()
             expression = parts[1].strip()
             value = self.evaluate_expression(expression)
-            self.variables[var_name] = value
+            if '.' in var_name:
+                objet, champ = var_name.split('.', 1)
+                instance = self.evaluate_expression(objet)
+                self._emplacement(instance, champ).__set__(instance, value)
+            else:
+                self.variables[var_name] = value
             self.log_debug(f"Variable '{var_name}' = {value}")
             return None
 
@@ -129,13 +552,7 @@ class LapinInterpreter:
             func_name = line.split('(', 1)[0].strip()
             args_str = line[line.find('(')+1:line.rfind(')')]
             args = self.parse_arguments(args_str)
-
-            if func_name in self.functions:
-                return self.call_function(func_name, args)
-            elif func_name in self.builtins:
-                return self.builtins[func_name](*args)
-            else:
-                raise Exception(f"Fonction '{func_name}' non définie")
+            return self.call(func_name, args)
 
         # INCLURE
         elif line.startswith('inclure '):
@@ -149,11 +566,11 @@ class LapinInterpreter:
         expr = expr.strip()
 
         # Chaîne littérale
-        if expr.startswith('"') and expr.endswith('"'):
+        if expr.startswith('"') and expr.endswith('"') and expr.count('"') == 2:
             return expr[1:-1]
 
         # Nombre
-        if re.match(r'^-?\d+(\.\d+)?$', expr):
+        if self.NOMBRE.match(expr):
             if '.' in expr:
                 return float(expr)
             return int(expr)
@@ -173,40 +590,160 @@ class LapinInterpreter:
         if expr in self.variables:
             return self.variables[expr]
 
-        # Opérations mathématiques
-        for op, func in [
-            ('+', lambda a, b: a + b),
-            ('-', lambda a, b: a - b),
-            ('*', lambda a, b: a * b),
-            ('/', lambda a, b: a / b if b != 0 else 0),
-            ('%', lambda a, b: a % b),
-            ('^', lambda a, b: a ** b)
-        ]:
-            if op in expr:
-                parts = expr.split(op, 1)
-                left = self.evaluate_expression(parts[0].strip())
-                right = self.evaluate_expression(parts[1].strip())
-                return func(left, right)
-
-        # Comparaisons
-        for op, func in [
-            ('==', lambda a, b: a == b),
-            ('!=', lambda a, b: a != b),
-            ('<', lambda a, b: a < b),
-            ('<=', lambda a, b: a <= b),
-            ('>', lambda a, b: a > b),
-            ('>=', lambda a, b: a >= b),
-            ('et', lambda a, b: a and b),
-            ('ou', lambda a, b: a or b)
-        ]:
-            if f' {op} ' in expr:
-                parts = expr.split(f' {op} ', 1)
-                left = self.evaluate_expression(parts[0].strip())
-                right = self.evaluate_expression(parts[1].strip())
-                return func(left, right)
+        # Appel de fonction
+        if expr.endswith(')'):
+            match = self.APPEL.match(expr)
+            if match and self._parentheses_equilibrees(match.group(2)):
+                return self.call(match.group(1), self.parse_arguments(match.group(2)))
+
+        # Structure (comme valeur, pour `charger`) et champ d'une structure
+        if expr in self.structures:
+            return self.structures[expr]
+        if '.' in expr:
+            match = self.CHAMP.match(expr)
+            if match and match.group(1) in self.variables:
+                objet = self.variables[match.group(1)]
+                return self._emplacement(objet, match.group(2)).__get__(objet)
+
+        # Comparaisons et opérateurs logiques (priorité la plus faible d'abord),
+        # cherchés seulement si l'expression peut en contenir
+        if '=' in expr or '<' in expr or '>' in expr or ' et ' in expr or ' ou ' in expr:
+            for op, func in self.COMPARAISONS:
+                position = self._trouver_operateur(expr, op)
+                if position >= 0:
+                    left = self.evaluate_expression(expr[:position])
+                    right = self.evaluate_expression(expr[position + len(op):])
+                    return func(left, right)
+
+        # Opérations mathématiques : `*`, `/` et `%` ont la même priorité et
+        # sont, comme `+` et `-`, associatives à gauche ; `^` est associatif à droite
+        for ops, premier in self.NIVEAUX:
+            position = self._trouver_arithmetique(expr, ops, premier)
+            if position >= 0:
+                left = self.evaluate_expression(expr[:position])
+                right = self.evaluate_expression(expr[position + 1:])
+                return self.OPERATIONS[expr[position]](left, right)
 
         raise Exception(f"Expression non reconnue: {expr}")
 
+    def _trouver_operateur(self, expr, op, dernier=False):
+        """Position de `op` hors des chaînes et des parenthèses, ou -1"""
+        if op not in expr:
+            return -1
+
+        # Cas courant : ni chaîne ni parenthèse, recherche directe
+        if '"' not in expr and '(' not in expr and '[' not in expr:
+            position = expr.rfind(op) if dernier else expr.find(op, 1)
+            return position if position > 0 else -1
+
+        position = -1
+        depth = 0
+        in_string = False
+        for i, char in enumerate(expr):
+            if char == '"':
+                in_string = not in_string
+            elif in_string:
+                continue
+            elif char in '([':
+                depth += 1
+            elif char in ')]':
+                depth -= 1
+            elif depth == 0 and i > 0 and expr.startswith(op, i):
+                position = i
+                if not dernier:
+                    break
+        return position
+
+    def _trouver_arithmetique(self, expr, ops, premier=False):
+        """Position où couper `expr` sur l'un des opérateurs `ops`, ou -1
+
+        `ops` regroupe des opérateurs d'un caractère de même priorité. La
+        coupure se fait au dernier d'entre eux (au premier si `premier`),
+        hors chaînes et parenthèses. Un opérateur qui suit un autre
+        opérateur, comme le `-` de `a - -3`, est un signe et pas une coupure.
+        """
+        # Cas courant : ni chaîne ni parenthèse, recherche directe
+        if '"' not in expr and '(' not in expr and '[' not in expr:
+            meilleure = -1
+            for op in ops:
+                position = expr.find(op, 1) if premier else expr.rfind(op)
+                while position > 0 and not self._binaire(expr, position):
+                    position = expr.find(op, position + 1) if premier else expr.rfind(op, 0, position)
+                if position > 0 and (meilleure < 0 or (position < meilleure) == premier):
+                    meilleure = position
+            return meilleure
+
+        position = -1
+        depth = 0
+        in_string = False
+        for i, char in enumerate(expr):
+            if char == '"':
+                in_string = not in_string
+            elif in_string:
+                continue
+            elif char in '([':
+                depth += 1
+            elif char in ')]':
+                depth -= 1
+            elif depth == 0 and i > 0 and char in ops and self._binaire(expr, i):
+                position = i
+                if premier:
+                    break
+        return position
+
+    def _binaire(self, expr, position):
+        """Vérifie que l'opérateur en `position` suit un opérande"""
+        i = position - 1
+        while i >= 0 and expr[i] == ' ':
+            i -= 1
+        return i >= 0 and expr[i] not in '+-*/%^(,['
+
+    def _parentheses_equilibrees(self, texte):
+        """Vérifie que `texte` ne ferme jamais une parenthèse non ouverte"""
+        depth = 0
+        for char in texte:
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth < 0:
+                    return False
+        return depth == 0
+
+    def call(self, func_name, args):
+        """Appelle une fonction utilisateur ou intégrée, ou construit une structure"""
+        if func_name in self.functions:
+            return self.call_function(func_name, args)
+        elif func_name in self.builtins:
+            return self.builtins[func_name](*args)
+        elif func_name in self.structures:
+            return self.structures[func_name](*args)
+        else:
+            raise Exception(f"Fonction '{func_name}' non définie")
+
+    def define_structure(self, line):
+        """Traite une déclaration `structure Nom(champ1, champ2)`"""
+        match = re.match(r'^structure (\w+)\((.*?)\)$', line)
+        if not match:
+            raise Exception("Syntaxe de structure invalide")
+
+        nom = match.group(1)
+        champs = [c.strip() for c in match.group(2).split(',') if c.strip()]
+        if not champs or not all(c.isidentifier() for c in champs) or len(set(champs)) != len(champs):
+            raise Exception(f"Champs invalides pour la structure '{nom}'")
+
+        self.structures[nom] = creer_structure(nom, champs)
+        self.log_debug(f"Définition structure '{nom}' avec les champs {champs}")
+
+    def _emplacement(self, objet, champ):
+        """Descripteur de l'emplacement `champ` d'une instance de structure"""
+        if not isinstance(objet, StructureLapin):
+            raise Exception(f"Accès au champ '{champ}' sur une valeur qui n'est pas une structure")
+        try:
+            return objet.index[champ]
+        except KeyError:
+            raise Exception(f"'{type(objet).__name__}' n'a pas de champ '{champ}'") from None
+
     # Commandes intégrées
     def cmd_afficher(self, args_str):
         """Affiche du texte avec saut de ligne"""
@@ -220,20 +757,20 @@ class LapinInterpreter:
     def cmd_ecrire(self, args_str):
         """Écrit du texte sans saut de ligne"""
         value = self.evaluate_expression(args_str)
-        print(str(value), end='', flush=True)
+        self.write(str(value))
         return None
 
     def cmd_lire(self):
         """Lit une ligne de texte"""
-        return input()
+        return self.lire_ligne()
 
     def cmd_lire_nombre(self):
         """Lit un nombre"""
         while True:
             try:
-                return float(input())
+                return float(self.lire_ligne())
             except ValueError:
-                print("Veuillez entrer un nombre valide: ", end='')
+                self.write("Veuillez entrer un nombre valide: ")
 
     def func_longueur(self, obj):
         """Retourne la longueur d'une liste ou chaîne"""
@@ -251,8 +788,8 @@ class LapinInterpreter:
     def func_nombre_aleatoire(self, min_val=0, max_val=1):
         """Génère un nombre aléatoire"""
         if isinstance(min_val, int) and isinstance(max_val, int):
-            return random.randint(min_val, max_val)
-        return random.uniform(min_val, max_val)
+            return self.aleatoire.randint(min_val, max_val)
+        return self.aleatoire.uniform(min_val, max_val)
 
     def func_maintenant(self):
         """Retourne l'heure actuelle"""
@@ -279,42 +816,73 @@ class LapinInterpreter:
         """Valeur absolue"""
         return abs(nombre)
 
-    def process_function(self, lines, start_idx):
+    def func_trier(self, liste, cle=None, decroissant=False):
+        """Trie une liste (copie stable), par indice, champ ou fonction LAPIN"""
+        if isinstance(cle, str) and (cle in self.functions or cle in self.builtins):
+            nom = cle
+            cle = lambda element: self.call(nom, [element])
+        return LapinStdLib.trier(liste, cle, decroissant)
+
+    def func_charger(self, structure, chemin, separateur=','):
+        """Charge un fichier (une ligne par enregistrement) en liste de structures
+
+        Un chemin relatif est d'abord cherché à côté du fichier en cours.
+        """
+        if not (isinstance(structure, type) and issubclass(structure, StructureLapin)):
+            raise Exception("charger attend une structure en premier argument")
+
+        if not os.path.isabs(chemin) and self.current_file and os.path.isfile(self.current_file):
+            voisin = os.path.join(os.path.dirname(self.current_file), chemin)
+            if os.path.exists(voisin):
+                chemin = voisin
+
+        def convertir(texte):
+            texte = texte.strip()
+            if re.match(r'^-?\d+$', texte):
+                return int(texte)
+            if re.match(r'^-?\d+\.\d+$', texte):
+                return float(texte)
+            return texte
+
+        enregistrements = []
+        with open(chemin, 'r', encoding='utf-8', newline='') as f:
+            for numero, champs in enumerate(csv.reader(f, delimiter=separateur), 1):
+                if not champs:
+                    continue
+                if len(champs) != len(structure.champs):
+                    raise Exception(f"{chemin} ligne {numero}: {len(champs)} champs au lieu de "
+                                    f"{len(structure.champs)}")
+                enregistrements.append(structure(*map(convertir, champs)))
+        return enregistrements
+
+    def process_function(self, lines, start_idx, offset=0):
         """Traite la définition d'une fonction"""
         line = lines[start_idx].strip()
-        # Format: fonction nom(param1, param2)
-        match = re.match(r'fonction (\w+)\((.*?)\)', line)
+        # Format: fonction [pure] nom(param1, param2)
+        match = re.match(r'fonction (?:(pure) )?(\w+)\((.*?)\)', line)
         if not match:
             raise Exception("Syntaxe de fonction invalide")
 
-        func_name = match.group(1)
-        params = [p.strip() for p in match.group(2).split(',') if p.strip()]
+        func_name = match.group(2)
+        params = [p.strip() for p in match.group(3).split(',') if p.strip()]
 
         # Trouver le corps de la fonction
-        body = []
-        i = start_idx + 1
-        depth = 1
-
-        while i < len(lines) and depth > 0:
-            line = lines[i].strip()
-            if line.startswith('fonction ') or line.startswith('si ') or line.startswith('tant que ') or line.startswith('repeter ') or line.startswith('pour chaque '):
-                depth += 1
-            elif line == 'fin':
-                depth -= 1
-                if depth == 0:
-                    break
-            body.append(line)
-            i += 1
-
-        if depth != 0:
+        body, _, _, i = self.code.decouper(lines, start_idx)
+        if i >= len(lines):
             raise Exception("Fonction non fermée par 'fin'")
 
         self.functions[func_name] = {
             'params': params,
             'body': body,
-            'start_line': start_idx
+            'start_line': offset + start_idx,
+            'fichier': self.current_file,
+            'pure': bool(match.group(1))
         }
 
+        # Une redéfinition peut changer la pureté et les résultats des autres fonctions
+        self.purete.clear()
+        self.cache.vider()
+
         self.log_debug(f"Définition fonction '{func_name}' avec {len(body)} lignes")
         return i + 1
 
@@ -328,110 +896,207 @@ class LapinInterpreter:
         if len(args) != len(func['params']):
             raise Exception(f"Nombre d'arguments incorrect pour '{func_name}'")
 
+        # Le débogueur doit voir chaque appel : pas de cache pendant le traçage
+        cle = None
+        if self.trace_hook is None and self.est_pure(func_name):
+            cle = self._cle_cache(func_name, args)
+            if cle is not None:
+                trouve, valeur = self.cache.obtenir(cle)
+                if trouve:
+                    return valeur
+
         # Sauvegarder l'état
         old_vars = self.variables.copy()
         old_line = self.current_line
+        old_file = self.current_file
 
         # Définir les paramètres comme variables locales
         for param_name, arg_value in zip(func['params'], args):
             self.variables[param_name] = arg_value
 
         self.call_stack.append(func_name)
+        self.current_file = func.get('fichier', old_file)
 
-        # Exécuter le corps
-        result = None
-        for line in func['body']:
-            if line.strip():
-                line_result = self.execute_line(line.strip())
-                if line_result is not None:
-                    result = line_result
-
-        # Restaurer l'état
-        self.variables = old_vars
-        self.current_line = old_line
-        self.call_stack.pop()
+        try:
+            if self.trace_hook is not None:
+                self.trace_hook('appel', func_name)
+            if self.observateur is not None:
+                self.observateur('appel', func_name)
+
+            # Exécuter le corps
+            result = self.execute_block(func['body'], func['start_line'] + 1)
+        except RetourFonction as retour:
+            result = retour.valeur
+        except Exception as e:
+            e.emplacement = self.emplacement_erreur(e)
+            raise
+        finally:
+            # Restaurer l'état
+            self.variables = old_vars
+            self.current_line = old_line
+            self.current_file = old_file
+            self.call_stack.pop()
+
+            if self.trace_hook is not None:
+                self.trace_hook('retour', func_name)
+            if self.observateur is not None:
+                self.observateur('retour', func_name)
+
+        # Les listes et structures retournées restent modifiables : on ne les
+        # met pas en cache, chaque appel doit rendre une nouvelle valeur
+        if cle is not None and not isinstance(result, (list, StructureLapin)):
+            self.cache.stocker(cle, result)
 
         return result
 
-    def process_if(self, lines, start_idx):
-        """Traite une condition si"""
-        line = lines[start_idx].strip()
-        # Format: si condition alors
-        condition_str = line[3:].replace('alors', '').strip()
-        condition = self.evaluate_expression(condition_str)
+    def _cle_cache(self, func_name, args):
+        """Clé de cache hachable, ou None si un argument ne s'y prête pas
 
-        # Trouver les blocs alors/sinon
-        then_body = []
-        else_body = []
-        i = start_idx + 1
-        depth = 1
-        in_then = True
+        Les listes sont hachées par structure (contenu), le type de chaque
+        valeur fait partie de la clé pour ne pas confondre 1, 1.0 et vrai.
+        """
+        def figer(valeur):
+            if isinstance(valeur, list):
+                return ('liste', tuple(figer(v) for v in valeur))
+            if isinstance(valeur, (int, float, str, bool)) or valeur is None:
+                return (type(valeur).__name__, valeur)
+            raise TypeError
 
-        while i < len(lines) and depth > 0:
-            line = lines[i].strip()
+        try:
+            return (func_name, tuple(figer(arg) for arg in args))
+        except TypeError:
+            return None
 
-            # Gérer l'imbrication
-            if line.startswith('si ') or line.startswith('tant que ') or line.startswith('repeter ') or line.startswith('pour chaque ') or line.startswith('fonction '):
-                depth += 1
-            elif line == 'sinon' and depth == 1:
-                in_then = False
-                i += 1
+    def est_pure(self, func_name):
+        """Indique si les résultats d'une fonction peuvent être mis en cache
+
+        Une fonction déclarée `fonction pure` est crue sur parole. Sinon, elle
+        est pure si son corps n'utilise que ses paramètres et variables locales,
+        et n'appelle que des fonctions intégrées sans effet de bord ou d'autres
+        fonctions pures.
+
+        Les fonctions voient les variables de l'appelant : un nom n'est local
+        qu'une fois affecté hors de tout bloc `si` ou boucle, et seulement
+        pour les lectures qui suivent. `total = total + n` lit donc `total`
+        chez l'appelant.
+        """
+        if func_name in self.purete:
+            return self.purete[func_name]
+
+        func = self.functions[func_name]
+        if func['pure']:
+            self.purete[func_name] = True
+            return True
+
+        # Hypothèse optimiste pendant l'analyse, pour les appels récursifs
+        deja_analysees = set(self.purete)
+        self.purete[func_name] = True
+        connus = set(func['params']) | self.MOTS_CLES
+        noms = []
+        pure = True
+        profondeur = 0
+
+        for line in func['body']:
+            line = re.sub(r'"[^"]*"', '""', line.strip())
+            if not line or line.startswith('#'):
                 continue
+            if line.startswith('fonction ') or line.startswith('structure '):
+                pure = False
+                break
+            cible = None
+            if ' = ' in line:
+                cible, line = [partie.strip() for partie in line.split(' = ', 1)]
+                if '.' in cible:
+                    # Modifie une structure reçue ou globale
+                    pure = False
+                    break
+            # Les noms de champs après un point ne sont pas des variables
+            line = re.sub(r'\.[A-Za-z_]\w*', '', line)
+            match = re.match(r'pour chaque (\w+) dans', line)
+            if match:
+                connus.add(match.group(1))
+            # Les noms pas encore affectés à ce stade sont lus chez l'appelant
+            noms.extend(nom for nom in re.findall(r'[A-Za-z_]\w*', line) if nom not in connus)
+
+            if cible is not None and profondeur == 0:
+                connus.add(cible)
+            if line.startswith(CacheCode.ENTETES):
+                profondeur += 1
             elif line == 'fin':
-                depth -= 1
-                if depth == 0:
+                profondeur -= 1
+
+        if pure:
+            for nom in noms:
+                if nom in self.BUILTINS_IMPURS:
+                    pure = False
+                elif nom in self.builtins or nom in self.structures:
+                    continue
+                elif nom in self.functions:
+                    pure = self.est_pure(nom)
+                else:
+                    # Lecture d'une variable globale : le résultat peut changer
+                    pure = False
+                if not pure:
                     break
 
-            if in_then:
-                then_body.append(line)
-            else:
-                else_body.append(line)
+        self.purete[func_name] = pure
+        if not pure:
+            # Les fonctions jugées pures grâce à l'hypothèse optimiste sont à revoir
+            for nom in set(self.purete) - deja_analysees:
+                if nom != func_name:
+                    del self.purete[nom]
+        return pure
+
+    def mark_branch(self, line_number, branch):
+        """Note la branche prise (1 ou 2) d'un `si` ou d'une boucle pour la couverture"""
+        branches = self.couverture.branches.get(self.current_file)
+        if branches is not None:
+            branches[line_number] |= branch
+
+    def process_if(self, lines, start_idx, offset=0):
+        """Traite une condition si"""
+        line = lines[start_idx].strip()
+        # Format: si condition alors
+        condition_str = line[3:].replace('alors', '').strip()
+        condition = self.evaluate_expression(condition_str)
 
-            i += 1
+        # Trouver les blocs alors/sinon
+        then_body, else_body, else_idx, i = self.code.decouper(lines, start_idx)
+
+        if self.couverture is not None:
+            self.mark_branch(offset + start_idx + 1, 1 if condition else 2)
 
         # Exécuter le bon bloc
         if condition:
-            for line in then_body:
-                if line.strip():
-                    self.execute_line(line.strip())
+            self.execute_block(then_body, offset + start_idx + 1)
         else:
-            for line in else_body:
-                if line.strip():
-                    self.execute_line(line.strip())
+            self.execute_block(else_body, offset + else_idx)
 
         return i + 1
 
-    def process_while(self, lines, start_idx):
+    def process_while(self, lines, start_idx, offset=0):
         """Traite une boucle tant que"""
         line = lines[start_idx].strip()
         # Format: tant que condition
         condition_str = line[9:].strip()
 
         # Trouver le corps
-        body = []
-        i = start_idx + 1
-        depth = 1
+        body, _, _, i = self.code.decouper(lines, start_idx)
 
-        while i < len(lines) and depth > 0:
-            line = lines[i].strip()
-            if line.startswith('tant que ') or line.startswith('si ') or line.startswith('repeter ') or line.startswith('pour chaque ') or line.startswith('fonction '):
-                depth += 1
-            elif line == 'fin':
-                depth -= 1
-                if depth == 0:
-                    break
-            body.append(line)
-            i += 1
+        # La branche est notée dès la première évaluation : un `retourner` ou
+        # une erreur dans le corps ne doit pas l'effacer
+        condition = self.evaluate_expression(condition_str)
+        if self.couverture is not None:
+            self.mark_branch(offset + start_idx + 1, 1 if condition else 2)
 
         # Exécuter la boucle
-        while self.evaluate_expression(condition_str):
-            for line in body:
-                if line.strip():
-                    self.execute_line(line.strip())
+        while condition:
+            self.execute_block(body, offset + start_idx + 1)
+            condition = self.evaluate_expression(condition_str)
 
         return i + 1
 
-    def process_repeat(self, lines, start_idx):
+    def process_repeat(self, lines, start_idx, offset=0):
         """Traite une boucle répéter"""
         line = lines[start_idx].strip()
         # Format: repeter X fois
@@ -442,39 +1107,28 @@ class LapinInterpreter:
         count = int(match.group(1))
 
         # Trouver le corps
-        body = []
-        i = start_idx + 1
-        depth = 1
+        body, _, _, i = self.code.decouper(lines, start_idx)
 
-        while i < len(lines) and depth > 0:
-            line = lines[i].strip()
-            if line.startswith('repeter ') or line.startswith('si ') or line.startswith('tant que ') or line.startswith('pour chaque ') or line.startswith('fonction '):
-                depth += 1
-            elif line == 'fin':
-                depth -= 1
-                if depth == 0:
-                    break
-            body.append(line)
-            i += 1
+        if self.couverture is not None:
+            self.mark_branch(offset + start_idx + 1, 1 if count else 2)
 
         # Exécuter la boucle
         for _ in range(count):
-            for line in body:
-                if line.strip():
-                    self.execute_line(line.strip())
+            self.execute_block(body, offset + start_idx + 1)
 
         return i + 1
 
-    def process_foreach(self, lines, start_idx):
+    def process_foreach(self, lines, start_idx, offset=0):
         """Traite une boucle pour chaque"""
         line = lines[start_idx].strip()
-        # Format: pour chaque element dans liste
-        match = re.match(r'pour chaque (\w+) dans (\w+)', line)
+        # Format: pour chaque element dans liste [en parallele]
+        match = re.match(r'pour chaque (\w+) dans (\w+)( en parallele)?', line)
         if not match:
             raise Exception("Syntaxe de boucle pour chaque invalide")
 
         var_name = match.group(1)
         list_name = match.group(2)
+        parallele = bool(match.group(3))
 
         if list_name not in self.variables:
             raise Exception(f"Liste '{list_name}' non définie")
@@ -484,27 +1138,18 @@ class LapinInterpreter:
             raise Exception(f"'{list_name}' n'est pas une liste")
 
         # Trouver le corps
-        body = []
-        i = start_idx + 1
-        depth = 1
+        body, _, _, i = self.code.decouper(lines, start_idx)
 
-        while i < len(lines) and depth > 0:
-            line = lines[i].strip()
-            if line.startswith('pour chaque ') or line.startswith('si ') or line.startswith('tant que ') or line.startswith('repeter ') or line.startswith('fonction '):
-                depth += 1
-            elif line == 'fin':
-                depth -= 1
-                if depth == 0:
-                    break
-            body.append(line)
-            i += 1
+        if self.couverture is not None:
+            self.mark_branch(offset + start_idx + 1, 1 if liste else 2)
 
         # Exécuter la boucle
-        for element in liste:
-            self.variables[var_name] = element
-            for line in body:
-                if line.strip():
-                    self.execute_line(line.strip())
+        if parallele:
+            self.process_foreach_parallel(var_name, liste, body, offset + start_idx + 1)
+        else:
+            for element in liste:
+                self.variables[var_name] = element
+                self.execute_block(body, offset + start_idx + 1)
 
         # Nettoyer la variable temporaire
         if var_name in self.variables and var_name != list_name:
@@ -512,6 +1157,143 @@ class LapinInterpreter:
 
         return i + 1
 
+    def analyse_parallel_body(self, var_name, body):
+        """Vérifie qu'un corps de boucle parallèle n'écrit pas d'état partagé
+
+        Retourne (collecteurs, reductions) : les listes extérieures remplies
+        par `ajouter(liste, valeur)` et les variables extérieures accumulées
+        par `total = total + valeur` (ou `*`). Toute autre écriture d'une
+        variable extérieure est refusée.
+        """
+        exterieures = set(self.variables) - {var_name}
+        collecteurs = []
+        reductions = {}
+        lignes_lues = []
+
+        for line in body:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            code = re.sub(r'"[^"]*"', '""', line)
+
+            if code.startswith(('fonction ', 'structure ')) or code == 'retourner' or code.startswith('retourner '):
+                raise Exception("Boucle parallèle: 'fonction', 'structure' et 'retourner' interdits dans le corps")
+
+            match = re.match(r'^ajouter\((\w+),(.*)\)$', code)
+            if match and match.group(1) in exterieures:
+                if match.group(1) not in collecteurs:
+                    collecteurs.append(match.group(1))
+                lignes_lues.append(match.group(2))
+                continue
+
+            if ' = ' in code:
+                cible, expression = [p.strip() for p in code.split(' = ', 1)]
+                if '.' in cible:
+                    base = cible.split('.', 1)[0]
+                    if base in exterieures or base == var_name:
+                        raise Exception(f"Boucle parallèle: écriture du champ partagé '{cible}'")
+                    lignes_lues.append(expression)
+                    continue
+                if cible in exterieures:
+                    reduction = re.match(rf'^{re.escape(cible)} ([+*]) (.+)$', expression)
+                    if not reduction or (reduction.group(1) == '*' and re.search(r'[+-]', reduction.group(2))):
+                        raise Exception(f"Boucle parallèle: écriture de la variable partagée '{cible}'")
+                    if reductions.setdefault(cible, reduction.group(1)) != reduction.group(1):
+                        raise Exception(f"Boucle parallèle: réductions incompatibles sur '{cible}'")
+                    lignes_lues.append(reduction.group(2))
+                    continue
+                if cible == var_name:
+                    raise Exception(f"Boucle parallèle: écriture de la variable de boucle '{var_name}'")
+                lignes_lues.append(expression)
+                continue
+
+            lignes_lues.append(code)
+
+        for code in lignes_lues:
+            for nom in re.findall(r'[A-Za-z_]\w*', re.sub(r'\.[A-Za-z_]\w*', '', code)):
+                if nom in collecteurs or nom in reductions:
+                    raise Exception(f"Boucle parallèle: '{nom}' est lue pendant qu'elle est accumulée")
+                if nom in self.BUILTINS_IMPURS or nom == 'lire_nombre':
+                    raise Exception(f"Boucle parallèle: '{nom}' a des effets de bord")
+                if nom in self.functions and not self.est_pure(nom):
+                    raise Exception(f"Boucle parallèle: la fonction '{nom}' n'est pas pure")
+
+        return collecteurs, reductions
+
+    def process_foreach_parallel(self, var_name, liste, body, offset):
+        """Exécute une boucle `pour chaque ... en parallele` par tranches
+
+        Les tranches partent vers un groupe de processus avec le corps, les
+        fonctions et une copie des variables lues. Les résultats sont
+        fusionnés dans l'ordre des tranches, donc dans l'ordre de la liste.
+        """
+        collecteurs, reductions = self.analyse_parallel_body(var_name, body)
+
+        # Petites listes, un seul processus, débogueur ou couverture actifs :
+        # le corps étant validé, l'exécution en séquence donne le même résultat
+        processus = self.processus or os.cpu_count() or 1
+        if (processus == 1 or len(liste) < self.SEUIL_PARALLELE
+                or self.trace_hook is not None or self.couverture is not None):
+            for element in liste:
+                self.variables[var_name] = element
+                self.execute_block(body, offset)
+            return
+
+        noms_lus = set(re.findall(r'[A-Za-z_]\w*', ' '.join(body)))
+        partagees = {
+            nom: valeur for nom, valeur in self.variables.items()
+            if nom in noms_lus and nom not in collecteurs and nom not in reductions
+        }
+        initiales = {}
+        for nom, op in reductions.items():
+            valeur = self.variables[nom]
+            initiales[nom] = 1 if op == '*' else type(valeur)()
+
+        structures = {nom: cls.champs for nom, cls in self.structures.items()}
+        etat = (body, offset, self.current_file, self.functions, structures, partagees,
+                var_name, collecteurs, initiales)
+        groupe = self.groupe_parallele(processus, etat)
+
+        # Les tranches ne transportent que leurs éléments
+        taille = max(1, -(-len(liste) // (processus * 4)))
+        tranches = [liste[debut:debut + taille] for debut in range(0, len(liste), taille)]
+        resultats = groupe.map(_executer_tranche_parallele, tranches)
+
+        for collectes, partielles in resultats:
+            for nom in collecteurs:
+                self.variables[nom].extend(collectes[nom])
+            for nom, op in reductions.items():
+                if op == '*':
+                    self.variables[nom] = self.variables[nom] * partielles[nom]
+                else:
+                    self.variables[nom] = self.variables[nom] + partielles[nom]
+
+    def groupe_parallele(self, processus, etat):
+        """Groupe de processus d'une boucle parallèle, initialisé avec `etat`
+
+        L'état partagé (corps, fonctions, variables lues) n'est envoyé
+        qu'une fois à chaque processus, par l'initialiseur du groupe. Le
+        groupe est réutilisé tant que cet état ne change pas, par exemple
+        pour une boucle parallèle répétée dans un `repeter`.
+        """
+        empreinte = pickle.dumps((processus, etat), pickle.HIGHEST_PROTOCOL)
+        if self._groupe is not None and empreinte == self._groupe_empreinte:
+            return self._groupe
+
+        self.fermer_groupe()
+        import multiprocessing
+        self._groupe = multiprocessing.Pool(processus, _initialiser_tranches, (etat,))
+        self._groupe_empreinte = empreinte
+        return self._groupe
+
+    def fermer_groupe(self):
+        """Arrête le groupe de processus des boucles parallèles, s'il existe"""
+        if self._groupe is not None:
+            self._groupe.terminate()
+            self._groupe.join()
+            self._groupe = None
+            self._groupe_empreinte = None
+
     def parse_arguments(self, args_str):
         """Parse les arguments d'une fonction"""
         if not args_str.strip():
@@ -520,15 +1302,20 @@ class LapinInterpreter:
         args = []
         current = ""
         depth = 0
+        in_string = False
 
         for char in args_str:
-            if char == ',' and depth == 0:
+            if char == ',' and depth == 0 and not in_string:
                 args.append(current.strip())
                 current = ""
             else:
-                if char == '(':
+                if char == '"':
+                    in_string = not in_string
+                elif in_string:
+                    pass
+                elif char in '([':
                     depth += 1
-                elif char == ')':
+                elif char in ')]':
                     depth -= 1
                 current += char
 
@@ -539,27 +1326,250 @@ class LapinInterpreter:
 
     def include_file(self, filename):
         """Inclut un autre fichier LAPIN"""
+        old_file = self.current_file
+        old_line = self.current_line
         try:
-            filepath = os.path.join(os.path.dirname(sys.argv[0]), filename)
+            filepath = os.path.join(self.dossier_inclusion, filename)
             if not os.path.exists(filepath):
+                if not os.path.exists(filename):
+                    # Fichier absent : ses deux emplacements possibles sont
+                    # notés pour que le mode surveillance relance à sa création
+                    self.fichiers_inclus.append(filepath)
                 filepath = filename
 
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
+            self.fichiers_inclus.append(filepath)
+            lines = self.code.lire_fichier(filepath)
 
-            self.execute(content, filename)
+            self.current_file = filepath
+            if self.couverture is not None:
+                self.couverture.enregistrer(filepath, lines)
+            try:
+                self.execute_block(lines, 0, afficher_resultats=True)
+            except Exception as e:
+                emplacement = self.emplacement_erreur(e)
+                e = Exception(f"ligne {emplacement[1]}: {e}")
+                e.emplacement = emplacement
+                raise e from None
             return f"Fichier '{filename}' inclus avec succès"
         except Exception as e:
-            raise Exception(f"Erreur inclusion fichier '{filename}': {e}")
+            erreur = Exception(f"Erreur inclusion fichier '{filename}': {e}")
+            erreur.emplacement = getattr(e, 'emplacement', None)
+            raise erreur from None
+        finally:
+            self.current_file = old_file
+            self.current_line = old_line
+
+class Programme:
+    """Programme LAPIN compilé une fois, exécutable autant de fois que voulu
+
+    Le programme ne garde que des données figées (lignes, structure des
+    blocs) : une même instance peut servir à plusieurs exécutions, y
+    compris en parallèle, chacune dans son propre interpréteur.
+    """
+
+    def __init__(self, source, nom="<programme>", code=None, dossier=None):
+        self.nom = nom
+        # Dossier des `inclure` fixé à la compilation (répertoire courant par défaut)
+        self.dossier = dossier if dossier is not None else os.getcwd()
+        self.lignes = tuple(source.split('\n'))
+        self.code = code if code is not None else CacheCode(taille_max=float('inf'))
+        self._analyser(self.lignes, 0)
+
+    def _analyser(self, lines, offset):
+        """Découpe tous les blocs à l'avance et vérifie leur syntaxe"""
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            if not line.startswith(CacheCode.ENTETES):
+                i += 1
+                continue
+
+            ligne = offset + i + 1
+            if line.startswith('fonction ') and not re.match(r'fonction (?:pure )?\w+\(.*?\)', line):
+                raise Exception(f"ligne {ligne}: Syntaxe de fonction invalide")
+            if line.startswith('repeter ') and not re.match(r'repeter \d+ fois', line):
+                raise Exception(f"ligne {ligne}: Syntaxe de boucle invalide")
+            if line.startswith('pour chaque ') and not re.match(r'pour chaque \w+ dans \w+', line):
+                raise Exception(f"ligne {ligne}: Syntaxe de boucle pour chaque invalide")
+
+            corps, sinon, else_idx, fin = self.code.decouper(lines, i)
+            if fin >= len(lines):
+                if line.startswith('fonction '):
+                    raise Exception(f"ligne {ligne}: Fonction non fermée par 'fin'")
+                entete = next(e for e in CacheCode.ENTETES if line.startswith(e))
+                raise Exception(f"ligne {ligne}: Bloc '{entete.strip()}' non fermé par 'fin'")
+
+            self._analyser(corps, offset + i + 1)
+            if sinon:
+                self._analyser(sinon, offset + else_idx)
+            i = fin + 1
+
+    def run(self, entrees=(), variables=None, sortie=None, graine=None, processus=None):
+        """Exécute le programme dans un interpréteur neuf
+
+        `entrees` fournit les lignes lues par `lire` / `lire_nombre`,
+        `variables` les valeurs initiales (copiées), `sortie` reçoit le texte
+        affiché au fil de l'exécution (objet avec .write), `graine` fixe
+        les tirages de `nombre_aleatoire` et `processus` le nombre de
+        processus des boucles parallèles. Retourne un dict
+        avec le succès, les variables finales, les lignes affichées, la durée
+        et l'emplacement de l'erreur éventuelle.
+        """
+        interpreter = LapinInterpreter(code=self.code, dossier_inclusion=self.dossier,
+                                       processus=processus)
+        if graine is not None:
+            interpreter.aleatoire.seed(graine)
+        if variables:
+            interpreter.variables.update(copy.deepcopy(variables))
+
+        entrees = iter(entrees)
+
+        def lire_ligne():
+            try:
+                return str(next(entrees))
+            except StopIteration:
+                raise Exception("Plus aucune entrée à lire") from None
+
+        interpreter.lire_ligne = lire_ligne
+        capture = io.StringIO() if sortie is None else None
+        interpreter.sortie = sortie if sortie is not None else capture
+
+        debut = time.perf_counter()
+        succes = interpreter.execute(self.lignes, self.nom)
+        duree = time.perf_counter() - debut
+
+        return {
+            'succes': succes,
+            'variables': interpreter.variables,
+            'sortie': interpreter.output,
+            'texte': capture.getvalue() if capture is not None else None,
+            'duree_s': duree,
+            'erreur': interpreter.derniere_erreur,
+        }
+
+
+def compile(source, nom="<programme>", code=None, dossier=None):
+    """Compile un programme LAPIN pour l'exécuter plusieurs fois"""
+    return Programme(source, nom, code, dossier)
+
+
+class Executeur:
+    """Exécute de nombreux programmes LAPIN en parallèle dans des threads
+
+    Les programmes compilés et les fichiers inclus sont analysés une seule
+    fois dans un CacheCode commun ; chaque exécution n'a en propre qu'un
+    interpréteur neuf avec ses variables et ses entrées/sorties.
+
+    Les programmes compilés (`max_programmes`) et les blocs analysés
+    (`taille_code`) sont bornés, pour un service qui tourne longtemps avec
+    des sources toujours nouvelles. Les boucles `en parallele` tournent sur
+    place : créer des processus depuis un groupe de threads peut bloquer.
+    """
+
+    def __init__(self, max_threads=None, dossier=None, max_programmes=256, taille_code=100000):
+        self.code = CacheCode(taille_max=taille_code)
+        self.dossier = dossier if dossier is not None else os.getcwd()
+        self.programmes = CacheLRU(max_programmes)
+        self._verrou = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='lapin')
+
+    def programme(self, source, nom="<programme>"):
+        """Programme compilé pour `source`, compilé au premier appel seulement"""
+        cle = (nom, source)
+        with self._verrou:
+            trouve, programme = self.programmes.obtenir(cle)
+        if not trouve:
+            programme = Programme(source, nom, self.code, self.dossier)
+            with self._verrou:
+                self.programmes.stocker(cle, programme)
+        return programme
+
+    def soumettre(self, programme, entrees=(), variables=None, sortie=None, graine=None):
+        """Lance une exécution ; retourne un Future dont le résultat est celui de Programme.run"""
+        if isinstance(programme, str):
+            programme = self.programme(programme)
+        # Les entrées sont figées ici pour qu'un itérateur ne soit pas partagé entre threads
+        return self._pool.submit(programme.run, list(entrees), variables, sortie, graine, 1)
+
+    def executer(self, programme, lots):
+        """Exécute un programme pour chaque lot d'entrées, résultats dans l'ordre des lots"""
+        futures = [self.soumettre(programme, entrees) for entrees in lots]
+        return [future.result() for future in futures]
+
+    def fermer(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+_TRANCHES = None
+
+
+def _initialiser_tranches(etat):
+    """Prépare l'interpréteur des tranches dans un processus du groupe"""
+    global _TRANCHES
+    body, offset, fichier, functions, structures, partagees, var_name, collecteurs, initiales = etat
+
+    interpreter = LapinInterpreter()
+    interpreter.current_file = fichier
+    interpreter.functions = functions
+    for nom, champs in structures.items():
+        interpreter.structures[nom] = creer_structure(nom, champs)
+    _TRANCHES = (interpreter, body, offset, partagees, var_name, collecteurs, initiales)
+
+
+def _executer_tranche_parallele(elements):
+    """Exécute une tranche de boucle parallèle avec l'état reçu à l'initialisation"""
+    interpreter, body, offset, partagees, var_name, collecteurs, initiales = _TRANCHES
+
+    interpreter.variables = dict(partagees)
+    for nom in collecteurs:
+        interpreter.variables[nom] = []
+    interpreter.variables.update(initiales)
+
+    try:
+        for element in elements:
+            interpreter.variables[var_name] = element
+            interpreter.execute_block(body, offset)
+    except Exception as e:
+        # L'emplacement voyage avec l'exception jusqu'au processus principal
+        e.emplacement = interpreter.emplacement_erreur(e)
+        raise
+
+    collectes = {nom: interpreter.variables[nom] for nom in collecteurs}
+    partielles = {nom: interpreter.variables[nom] for nom in initiales}
+    return collectes, partielles
 
 def main():
     """Point d'entrée principal"""
     import argparse
 
     parser = argparse.ArgumentParser(description='🐇 Interpréteur LAPIN')
-    parser.add_argument('fichier', nargs='?', help='Fichier .lapin à exécuter')
+    parser.add_argument('fichier', nargs='?', help='Fichier .lapin à exécuter (ou répertoire de tests avec --couverture)')
     parser.add_argument('--debug', action='store_true', help='Mode debug')
     parser.add_argument('--version', action='store_true', help='Afficher la version')
+    parser.add_argument('--cache', type=int, default=1024, metavar='N',
+                        help='Taille du cache des fonctions pures (0 pour désactiver)')
+    parser.add_argument('--processus', type=int, default=None, metavar='N',
+                        help='Nombre de processus des boucles parallèles')
+    parser.add_argument('--stats-cache', action='store_true',
+                        help='Afficher les statistiques du cache en fin de programme')
+    parser.add_argument('--memoire', nargs='?', const='-', metavar='RAPPORT.json',
+                        help="Produire un rapport mémoire JSON (sur la sortie d'erreur par défaut)")
+    parser.add_argument('--couverture', action='store_true',
+                        help='Mesurer la couverture des lignes et branches des tests')
+    parser.add_argument('--format-couverture', choices=['texte', 'json', 'lcov'], default='texte',
+                        help='Format du rapport de couverture')
+    parser.add_argument('--rapport-couverture', metavar='FICHIER',
+                        help='Écrire le rapport de couverture dans un fichier')
+    parser.add_argument('--surveiller', action='store_true',
+                        help='Relancer le programme à chaque modification de ses fichiers')
+    parser.add_argument('--lancer', metavar='FICHIER',
+                        help='Avec --surveiller, fichier à relancer (un test par exemple)')
 
     args = parser.parse_args()
 
@@ -567,7 +1577,49 @@ def main():
         print("🐇 LAPIN v1.0.0 - Langage d'Apprentissage de la Programmation INtutive")
         return
 
-    interpreter = LapinInterpreter(debug=args.debug)
+    if args.couverture:
+        from lapin_couverture import LapinCoverage
+        couverture = LapinCoverage()
+        succes = couverture.run([args.fichier or 'tests'])
+
+        # Un rapport JSON ou LCOV sur la sortie standard doit rester lisible
+        # par un outil : l'état des tests part alors sur la sortie d'erreur
+        etat = sys.stdout
+        if args.format_couverture != 'texte' and not args.rapport_couverture:
+            etat = sys.stderr
+
+        for resultat in couverture.resultats:
+            erreur = resultat['erreur']
+            if resultat['succes']:
+                print(f"✅ {resultat['fichier']}", file=etat)
+            elif erreur:
+                print(f"❌ {resultat['fichier']} ligne {erreur['ligne']}: {erreur['message']}", file=etat)
+            else:
+                print(f"❌ {resultat['fichier']}: {len(resultat['echecs'])} vérification(s) en échec",
+                      file=etat)
+                for texte in resultat['echecs']:
+                    print(f"      {texte}", file=etat)
+
+        rapport = couverture.report(args.format_couverture)
+        if args.rapport_couverture:
+            with open(args.rapport_couverture, 'w', encoding='utf-8') as f:
+                f.write(rapport)
+            print(f"📊 Rapport de couverture écrit dans {args.rapport_couverture}")
+        else:
+            print(rapport)
+        if not succes:
+            sys.exit(1)
+        return
+
+    if args.surveiller:
+        if not args.fichier:
+            parser.error("--surveiller demande un fichier")
+        from lapin_surveillance import LapinWatcher
+        LapinWatcher(args.fichier, args.lancer).watch()
+        return
+
+    interpreter = LapinInterpreter(debug=args.debug, taille_cache=args.cache,
+                                   processus=args.processus)
 
     if args.fichier:
         # Exécuter depuis un fichier
@@ -578,7 +1630,14 @@ def main():
             print(f"🐇 Exécution de {args.fichier}...")
             print("=" * 50)
 
-            success = interpreter.execute(code, args.fichier)
+            interpreter.sortie = sys.stdout
+
+            if args.memoire:
+                from lapin_memoire import LapinMemoryProfiler
+                profiler = LapinMemoryProfiler(interpreter)
+                success = profiler.run(code, args.fichier)
+            else:
+                success = interpreter.execute(code, args.fichier)
 
             print("=" * 50)
             if success:
@@ -586,6 +1645,22 @@ def main():
             else:
                 print("❌ Programme terminé avec des erreurs")
 
+            if args.stats_cache:
+                stats = interpreter.cache.statistiques()
+                print(f"🗃️  Cache: {stats['succes']} succès, {stats['echecs']} échecs, "
+                      f"{stats['evictions']} évictions ({stats['taille']}/{stats['taille_max']} entrées)")
+
+            if args.memoire:
+                rapport = json.dumps(dict(fichier=args.fichier, **profiler.report()),
+                                     ensure_ascii=False, indent=2)
+                if args.memoire == '-':
+                    # La sortie standard porte déjà celle du programme
+                    print(rapport, file=sys.stderr)
+                else:
+                    with open(args.memoire, 'w', encoding='utf-8') as f:
+                        f.write(rapport + '\n')
+                    print(f"🧠 Rapport mémoire écrit dans {args.memoire}")
+
         except FileNotFoundError:
             print(f"❌ Fichier '{args.fichier}' introuvable")
             sys.exit(1)
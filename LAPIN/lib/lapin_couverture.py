@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+🐇 LAPIN - Couverture de code
+Lignes et branches exécutées par une suite de tests LAPIN,
+rapports texte, JSON et LCOV
+"""
+
+import json
+import os
+import re
+
+from lapin import LapinInterpreter
+
+ENTETES_BOUCLE = ('tant que ', 'repeter ', 'pour chaque ')
+
+
+class LapinCoverage:
+    """Tables de couverture remplies directement par `LapinInterpreter`.
+
+    Pour chaque fichier, `lignes` note les lignes exécutées et `branches`
+    les branches prises (1 : alors / boucle entrée, 2 : sinon / boucle
+    sautée), un octet par ligne.
+    """
+
+    def __init__(self):
+        self.sources = {}
+        self.lignes = {}
+        self.branches = {}
+        self.resultats = []
+
+    def enregistrer(self, fichier, lines):
+        """Prépare les tables d'un fichier avant son exécution"""
+        if fichier not in self.lignes:
+            self.sources[fichier] = tuple(lines)
+            self.lignes[fichier] = bytearray(len(lines) + 1)
+            self.branches[fichier] = bytearray(len(lines) + 1)
+
+    # Exécution
+
+    def run_file(self, chemin):
+        """Exécute un fichier de test en mesurant sa couverture
+
+        Le test échoue sur une erreur d'exécution ou s'il affiche une ligne
+        commençant par ❌, comme les vérifications `si ... sinon` des tests.
+        Un test qui contient `# erreur attendue: <texte>` réussit au
+        contraire s'il s'arrête sur une erreur dont le message contient ce texte.
+        """
+        with open(chemin, 'r', encoding='utf-8') as f:
+            code = f.read()
+
+        interpreter = LapinInterpreter()
+        interpreter.couverture = self
+        execute = interpreter.execute(code, chemin)
+
+        attendue = re.search(r'^#\s*erreur attendue\s*:\s*(.+?)\s*$', code, re.MULTILINE)
+        if attendue:
+            erreur = interpreter.derniere_erreur
+            succes = erreur is not None and attendue.group(1) in erreur['message']
+            echecs = [] if erreur else [f"❌ Erreur attendue non levée: {attendue.group(1)}"]
+        else:
+            echecs = [texte for texte in interpreter.output if texte.startswith('❌')] if execute else []
+            succes = execute and not echecs
+
+        self.resultats.append({
+            'fichier': chemin,
+            'succes': succes,
+            'erreur': interpreter.derniere_erreur,
+            'echecs': echecs,
+        })
+        return succes
+
+    def run(self, chemins):
+        """Exécute des fichiers de test ou tous les .lapin de répertoires"""
+        for chemin in chemins:
+            if os.path.isdir(chemin):
+                for racine, _, fichiers in sorted(os.walk(chemin)):
+                    for nom in sorted(fichiers):
+                        if nom.endswith('.lapin'):
+                            self.run_file(os.path.join(racine, nom))
+            else:
+                self.run_file(chemin)
+        return all(resultat['succes'] for resultat in self.resultats)
+
+    # Analyse
+
+    def analyse(self, fichier):
+        """Lignes exécutables, exécutées et branches d'un fichier"""
+        sources = self.sources[fichier]
+        lignes = self.lignes[fichier]
+        branches = self.branches[fichier]
+
+        executables = []
+        executees = []
+        detail = []
+
+        for numero, source in enumerate(sources, 1):
+            line = source.strip()
+            if not line or line.startswith('#') or line in ('fin', 'sinon'):
+                continue
+            executables.append(numero)
+            if lignes[numero]:
+                executees.append(numero)
+
+            if line.startswith('si '):
+                noms = ('alors', 'sinon')
+            elif line.startswith(ENTETES_BOUCLE):
+                noms = ('entree', 'sautee')
+            else:
+                continue
+            detail.append({
+                'ligne': numero,
+                'type': 'si' if noms[0] == 'alors' else 'boucle',
+                'atteinte': bool(lignes[numero]),
+                'prises': {
+                    noms[0]: bool(branches[numero] & 1),
+                    noms[1]: bool(branches[numero] & 2),
+                },
+            })
+
+        prises = sum(sum(b['prises'].values()) for b in detail)
+
+        return {
+            'lignes_executables': len(executables),
+            'lignes_executees': len(executees),
+            'lignes_manquantes': [n for n in executables if not lignes[n]],
+            'branches_total': 2 * len(detail),
+            'branches_prises': prises,
+            'branches': detail,
+        }
+
+    # Rapports
+
+    @staticmethod
+    def _taux(fait, total):
+        return 100.0 * fait / total if total else 100.0
+
+    @staticmethod
+    def _plages(numeros):
+        """[3, 4, 5, 9] -> '3-5, 9'"""
+        plages = []
+        for numero in numeros:
+            if plages and plages[-1][1] == numero - 1:
+                plages[-1][1] = numero
+            else:
+                plages.append([numero, numero])
+        return ', '.join(str(a) if a == b else f"{a}-{b}" for a, b in plages)
+
+    def report_json(self):
+        fichiers = {fichier: self.analyse(fichier) for fichier in sorted(self.sources)}
+        for analyse in fichiers.values():
+            analyse['taux_lignes'] = self._taux(analyse['lignes_executees'], analyse['lignes_executables'])
+            analyse['taux_branches'] = self._taux(analyse['branches_prises'], analyse['branches_total'])
+
+        executables = sum(a['lignes_executables'] for a in fichiers.values())
+        executees = sum(a['lignes_executees'] for a in fichiers.values())
+        branches = sum(a['branches_total'] for a in fichiers.values())
+        prises = sum(a['branches_prises'] for a in fichiers.values())
+
+        return json.dumps({
+            'tests': self.resultats,
+            'fichiers': fichiers,
+            'total': {
+                'lignes_executables': executables,
+                'lignes_executees': executees,
+                'taux_lignes': self._taux(executees, executables),
+                'branches_total': branches,
+                'branches_prises': prises,
+                'taux_branches': self._taux(prises, branches),
+            },
+        }, ensure_ascii=False, indent=2)
+
+    def report_text(self):
+        lignes = [f"{'Fichier':<40} {'Lignes':>7} {'Exéc.':>6} {'Couv.':>7} {'Branches':>9}  Manquantes"]
+        lignes.append('-' * 90)
+        total_exe = total_fait = total_br = total_prises = 0
+
+        for fichier in sorted(self.sources):
+            analyse = self.analyse(fichier)
+            total_exe += analyse['lignes_executables']
+            total_fait += analyse['lignes_executees']
+            total_br += analyse['branches_total']
+            total_prises += analyse['branches_prises']
+            taux = self._taux(analyse['lignes_executees'], analyse['lignes_executables'])
+            lignes.append(
+                f"{fichier:<40} {analyse['lignes_executables']:>7} {analyse['lignes_executees']:>6} "
+                f"{taux:>6.1f}% {analyse['branches_prises']:>4}/{analyse['branches_total']:<4}  "
+                f"{self._plages(analyse['lignes_manquantes'])}"
+            )
+
+        lignes.append('-' * 90)
+        lignes.append(
+            f"{'TOTAL':<40} {total_exe:>7} {total_fait:>6} "
+            f"{self._taux(total_fait, total_exe):>6.1f}% {total_prises:>4}/{total_br:<4}"
+        )
+        return '\n'.join(lignes)
+
+    def report_lcov(self):
+        sortie = []
+        for fichier in sorted(self.sources):
+            analyse = self.analyse(fichier)
+            lignes = self.lignes[fichier]
+            manquantes = set(analyse['lignes_manquantes'])
+
+            sortie.append('TN:')
+            sortie.append(f"SF:{os.path.abspath(fichier)}")
+            for numero in range(1, len(lignes)):
+                if numero in manquantes or lignes[numero]:
+                    sortie.append(f"DA:{numero},{lignes[numero]}")
+            for bloc, branche in enumerate(analyse['branches']):
+                for index, prise in enumerate(branche['prises'].values()):
+                    compte = (1 if prise else 0) if branche['atteinte'] else '-'
+                    sortie.append(f"BRDA:{branche['ligne']},{bloc},{index},{compte}")
+            sortie.append(f"BRF:{analyse['branches_total']}")
+            sortie.append(f"BRH:{analyse['branches_prises']}")
+            sortie.append(f"LF:{analyse['lignes_executables']}")
+            sortie.append(f"LH:{analyse['lignes_executees']}")
+            sortie.append('end_of_record')
+        return '\n'.join(sortie) + '\n'
+
+    def report(self, format='texte'):
+        if format == 'json':
+            return self.report_json()
+        if format == 'lcov':
+            return self.report_lcov()
+        return self.report_text()
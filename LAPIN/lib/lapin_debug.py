@@ -1,114 +1,365 @@
 #!/usr/bin/env python3
 """
-🐇 LAPIN - Version Debug
-Interpréteur simplifié avec messages d'erreur clairs
+🐇 LAPIN - Débogueur
+Points d'arrêt, pas à pas et inspection des variables,
+au-dessus du vrai interpréteur LAPIN
 """
 
+import os
 import sys
 
+from lapin import LapinInterpreter
+
+
+class ArretDebogueur(BaseException):
+    """Levée quand l'utilisateur quitte le débogueur.
+
+    Hérite de BaseException pour ne pas être capturée comme une erreur
+    du programme LAPIN par `LapinInterpreter.execute`.
+    """
+
+
+class LapinDebugger:
+    """Débogueur piloté par les accroches de `LapinInterpreter`.
+
+    Tant qu'aucun point d'arrêt n'est posé et qu'on n'avance pas pas à pas,
+    l'accroche de l'interpréteur reste désactivée : le programme tourne
+    à la vitesse normale.
+    """
+
+    AIDE = """Commandes:
+  c, continuer             Continuer jusqu'au prochain point d'arrêt
+  s, pas                   Avancer d'une ligne (entre dans les fonctions)
+  n, suivant               Avancer d'une ligne (passe par-dessus les fonctions)
+  b, arret <spec>          Poser un point d'arrêt :
+                             12 | fichier.lapin:12 | nom_fonction
+                             12 si <condition> | si <condition>
+  d, supprimer <numéro>    Supprimer un point d'arrêt
+  i, arrets                Lister les points d'arrêt
+  l, locales               Afficher les variables visibles
+  p, valeur <expression>   Évaluer une expression
+  w, surveiller <expr>     Ajouter une expression à la liste de surveillance
+  u, oublier <numéro>      Retirer une expression surveillée
+  pile                     Afficher la pile d'appels
+  q, quitter               Arrêter le programme
+  h, aide                  Afficher cette aide"""
+
+    def __init__(self, interpreter=None):
+        self.interpreter = interpreter or LapinInterpreter()
+        self.filename = None
+        self.lines = []
+        self.breakpoints = []
+        self.next_id = 1
+        self.watches = []
+        self.mode = 'continuer'
+        self.step_depth = 0
+        self.shown_output = 0
+
+    # Points d'arrêt
+
+    def add_breakpoint(self, spec):
+        """Ajoute un point d'arrêt à partir de sa description textuelle"""
+        spec = spec.strip()
+        condition = None
+
+        if spec.startswith('si '):
+            target, condition = '', spec[3:].strip()
+        elif ' si ' in spec:
+            target, condition = spec.split(' si ', 1)
+            target, condition = target.strip(), condition.strip()
+        else:
+            target = spec
+
+        bp = {
+            'id': self.next_id,
+            'fichier': None,
+            'ligne': None,
+            'fonction': None,
+            'condition': condition,
+        }
+
+        if not target:
+            if not condition:
+                raise ValueError("Point d'arrêt vide")
+        elif target.isdigit():
+            bp['fichier'] = os.path.basename(self.filename) if self.filename else None
+            bp['ligne'] = int(target)
+        elif ':' in target and target.rsplit(':', 1)[1].isdigit():
+            fichier, ligne = target.rsplit(':', 1)
+            bp['fichier'] = os.path.basename(fichier)
+            bp['ligne'] = int(ligne)
+        elif target.isidentifier():
+            bp['fonction'] = target
+        else:
+            raise ValueError(f"Point d'arrêt invalide: '{spec}'")
+
+        self.breakpoints.append(bp)
+        self.next_id += 1
+        self._update_hook()
+        return bp
+
+    def remove_breakpoint(self, bp_id):
+        """Supprime un point d'arrêt par son numéro"""
+        before = len(self.breakpoints)
+        self.breakpoints = [bp for bp in self.breakpoints if bp['id'] != bp_id]
+        self._update_hook()
+        return len(self.breakpoints) != before
+
+    def describe_breakpoint(self, bp):
+        if bp['fonction']:
+            where = f"fonction {bp['fonction']}"
+        elif bp['ligne'] is not None:
+            where = f"{bp['fichier'] or '<programme>'}:{bp['ligne']}"
+        else:
+            where = "toute ligne"
+        if bp['condition']:
+            where += f" si {bp['condition']}"
+        return f"#{bp['id']} {where}"
+
+    def _update_hook(self):
+        """N'active l'accroche de l'interpréteur que si elle peut servir"""
+        if self.mode != 'continuer' or self.breakpoints:
+            self.interpreter.trace_hook = self.on_event
+        else:
+            self.interpreter.trace_hook = None
+
+    def _condition_ok(self, bp):
+        if not bp['condition']:
+            return True
+        try:
+            return bool(self.interpreter.evaluate_expression(bp['condition']))
+        except Exception:
+            return False
+
+    def _matching_breakpoint(self, event, info):
+        current_file = self.interpreter.current_file
+        current_file = os.path.basename(current_file) if current_file else None
+
+        for bp in self.breakpoints:
+            if event == 'appel':
+                if bp['fonction'] == info and self._condition_ok(bp):
+                    return bp
+            elif bp['fonction'] is None:
+                if bp['ligne'] is not None:
+                    if bp['ligne'] != info:
+                        continue
+                    if bp['fichier'] is not None and bp['fichier'] != current_file:
+                        continue
+                if self._condition_ok(bp):
+                    return bp
+        return None
+
+    # Accroche de l'interpréteur
+
+    def on_event(self, event, info):
+        """Appelé par l'interpréteur avant chaque ligne et à chaque appel"""
+        if event == 'retour':
+            return
+
+        depth = len(self.interpreter.call_stack)
+        reason = None
+
+        if event == 'ligne':
+            if self.mode == 'pas':
+                reason = 'pas'
+            elif self.mode == 'suivant' and depth <= self.step_depth:
+                reason = 'pas'
+
+        if reason is None and self.breakpoints:
+            bp = self._matching_breakpoint(event, info)
+            if bp is not None:
+                reason = f"point d'arrêt {self.describe_breakpoint(bp)}"
+
+        if reason is not None:
+            self.stop(event, info, reason)
+
+    # Interaction
+
+    def flush_output(self):
+        """Affiche les sorties produites par le programme depuis le dernier arrêt"""
+        output = self.interpreter.output
+        if len(output) < self.shown_output:
+            self.shown_output = 0
+        for text in output[self.shown_output:]:
+            print(text)
+        self.shown_output = len(output)
+
+    def current_source_line(self):
+        interp = self.interpreter
+        if interp.current_file == self.filename and 0 < interp.current_line <= len(self.lines):
+            return self.lines[interp.current_line - 1].rstrip()
+        return ''
+
+    def show_location(self, event, info, reason):
+        interp = self.interpreter
+        fichier = os.path.basename(interp.current_file or '<programme>')
+        if event == 'appel':
+            print(f"⏸️  [{reason}] entrée dans '{info}' ({fichier}:{interp.current_line})")
+        else:
+            print(f"⏸️  [{reason}] {fichier}:{info}")
+            source = self.current_source_line()
+            if source:
+                print(f"[{info:3d}] > {source}")
+        self.show_watches()
+
+    def show_watches(self):
+        for index, expr in enumerate(self.watches, 1):
+            print(f"      👁️  {index}: {expr} = {self.evaluate(expr)}")
+
+    def show_locals(self):
+        interp = self.interpreter
+        params = []
+        if interp.call_stack:
+            func = interp.functions.get(interp.call_stack[-1])
+            if func:
+                params = func['params']
+        if not interp.variables:
+            print("      (aucune variable)")
+        for name in params:
+            if name in interp.variables:
+                print(f"      {name} = {interp.variables[name]!r} (paramètre)")
+        for name, value in interp.variables.items():
+            if name not in params:
+                print(f"      {name} = {value!r}")
+
+    def show_stack(self):
+        print("      <programme>")
+        for depth, name in enumerate(self.interpreter.call_stack, 1):
+            print(f"      {'  ' * depth}{name}()")
+
+    def evaluate(self, expr):
+        try:
+            return repr(self.interpreter.evaluate_expression(expr))
+        except Exception as e:
+            return f"❌ {e}"
+
+    def stop(self, event, info, reason):
+        """Suspend le programme et lit les commandes de l'utilisateur"""
+        self.flush_output()
+        self.show_location(event, info, reason)
+
+        while True:
+            try:
+                command = input("(lapin-debug) ").strip()
+            except EOFError:
+                raise ArretDebogueur()
+
+            name, _, arg = command.partition(' ')
+            arg = arg.strip()
+
+            if name in ('c', 'continuer'):
+                self.mode = 'continuer'
+                break
+            elif name in ('s', 'pas'):
+                self.mode = 'pas'
+                break
+            elif name in ('n', 'suivant'):
+                self.mode = 'suivant'
+                self.step_depth = len(self.interpreter.call_stack)
+                break
+            elif name in ('b', 'arret'):
+                try:
+                    bp = self.add_breakpoint(arg)
+                    print(f"      Point d'arrêt {self.describe_breakpoint(bp)}")
+                except ValueError as e:
+                    print(f"      ❌ {e}")
+            elif name in ('d', 'supprimer'):
+                if arg.isdigit() and self.remove_breakpoint(int(arg)):
+                    print(f"      Point d'arrêt #{arg} supprimé")
+                else:
+                    print(f"      ❌ Point d'arrêt inconnu: '{arg}'")
+            elif name in ('i', 'arrets'):
+                if not self.breakpoints:
+                    print("      (aucun point d'arrêt)")
+                for bp in self.breakpoints:
+                    print(f"      {self.describe_breakpoint(bp)}")
+            elif name in ('l', 'locales'):
+                self.show_locals()
+            elif name in ('p', 'valeur'):
+                print(f"      {self.evaluate(arg)}")
+            elif name in ('w', 'surveiller'):
+                if arg:
+                    self.watches.append(arg)
+                self.show_watches()
+            elif name in ('u', 'oublier'):
+                if arg.isdigit() and 0 < int(arg) <= len(self.watches):
+                    self.watches.pop(int(arg) - 1)
+                else:
+                    print(f"      ❌ Expression surveillée inconnue: '{arg}'")
+            elif name == 'pile':
+                self.show_stack()
+            elif name in ('q', 'quitter'):
+                raise ArretDebogueur()
+            elif name in ('h', 'aide', ''):
+                print(self.AIDE)
+            else:
+                print(f"      ⚠️  Commande non reconnue: '{name}' (tapez 'aide')")
+
+        self._update_hook()
+
+    def run(self, filename, stop_at_start=True):
+        """Lance le programme sous le contrôle du débogueur"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            code = f.read()
+
+        self.filename = filename
+        self.lines = code.split('\n')
+        self.mode = 'pas' if stop_at_start else 'continuer'
+        self._update_hook()
+
+        try:
+            success = self.interpreter.execute(code, filename)
+        except ArretDebogueur:
+            success = None
+        finally:
+            self.interpreter.trace_hook = None
+
+        self.flush_output()
+        return success
+
+
 def main():
-    print("🐇 LAPIN DEBUG - Version 1.0")
+    import argparse
+
+    parser = argparse.ArgumentParser(description='🐇 LAPIN DEBUG - Débogueur')
+    parser.add_argument('fichier', help='Fichier .lapin à déboguer')
+    parser.add_argument('-b', '--arret', action='append', default=[],
+                        help="Point d'arrêt (ligne, fichier:ligne, fonction, '12 si x > 3')")
+    parser.add_argument('-w', '--surveiller', action='append', default=[],
+                        help='Expression à surveiller')
+    parser.add_argument('--continuer', action='store_true',
+                        help="Ne pas s'arrêter sur la première ligne")
+
+    args = parser.parse_args()
+
+    print("🐇 LAPIN DEBUG - Version 2.0")
     print("=" * 50)
-    
-    if len(sys.argv) < 2:
-        print("Usage: python lapin_debug.py <fichier.lapin>")
-        return
-    
-    filename = sys.argv[1]
-    print(f"Lecture du fichier: {filename}")
-    
+
+    debugger = LapinDebugger()
+    debugger.filename = args.fichier
+    debugger.watches.extend(args.surveiller)
+
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        variables = {}
-        line_num = 0
-        
-        for line in lines:
-            line_num += 1
-            original_line = line.rstrip()
-            line = original_line.strip()
-            
-            # Ignorer les lignes vides et commentaires
-            if not line or line.startswith('#'):
-                print(f"[{line_num:3d}] # {original_line}")
-                continue
-            
-            print(f"[{line_num:3d}] > {original_line}")
-            
-            try:
-                # Commande AFFICHER
-                if line.startswith('afficher '):
-                    text = line[9:]
-                    if text.startswith('"') and text.endswith('"'):
-                        text = text[1:-1]
-                    # Remplacer les variables
-                    for var, val in variables.items():
-                        text = text.replace(var, str(val))
-                    print(f"      {text}")
-                
-                # Commande ÉCRIRE
-                elif line.startswith('ecrire '):
-                    text = line[7:]
-                    if text.startswith('"') and text.endswith('"'):
-                        text = text[1:-1]
-                    print(text, end='')
-                
-                # Affectation de variable
-                elif '=' in line:
-                    parts = line.split('=', 1)
-                    var_name = parts[0].strip()
-                    value_expr = parts[1].strip()
-                    
-                    # Chaîne de caractères
-                    if value_expr.startswith('"') and value_expr.endswith('"'):
-                        variables[var_name] = value_expr[1:-1]
-                        print(f"      Variable '{var_name}' = '{variables[var_name]}'")
-                    
-                    # Nombre entier
-                    elif value_expr.isdigit():
-                        variables[var_name] = int(value_expr)
-                        print(f"      Variable '{var_name}' = {variables[var_name]}")
-                    
-                    # Nombre décimal
-                    elif value_expr.replace('.', '', 1).isdigit() and value_expr.count('.') == 1:
-                        variables[var_name] = float(value_expr)
-                        print(f"      Variable '{var_name}' = {variables[var_name]}")
-                    
-                    # Variable existante
-                    elif value_expr in variables:
-                        variables[var_name] = variables[value_expr]
-                        print(f"      Variable '{var_name}' = {variables[var_name]} (copié de '{value_expr}')")
-                    
-                    # Booléen
-                    elif value_expr in ['vrai', 'faux']:
-                        variables[var_name] = value_expr == 'vrai'
-                        print(f"      Variable '{var_name}' = {variables[var_name]}")
-                    
-                    else:
-                        print(f"      ⚠️  Expression non reconnue: '{value_expr}'")
-                
-                # LIRE
-                elif line.startswith('lire '):
-                    var_name = line[5:].strip()
-                    variables[var_name] = input("? ")
-                    print(f"      Variable '{var_name}' = '{variables[var_name]}'")
-                
-                # Autre
-                else:
-                    print(f"      ⚠️  Commande non reconnue")
-            
-            except Exception as e:
-                print(f"      ❌ Erreur: {e}")
-        
-        print("\n" + "=" * 50)
-        print("✅ Programme terminé")
-        print(f"Variables finales: {variables}")
-        
+        for spec in args.arret:
+            debugger.add_breakpoint(spec)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    try:
+        success = debugger.run(args.fichier, stop_at_start=not args.continuer)
     except FileNotFoundError:
-        print(f"❌ Fichier '{filename}' introuvable")
-    except Exception as e:
-        print(f"❌ Erreur générale: {e}")
+        print(f"❌ Fichier '{args.fichier}' introuvable")
+        sys.exit(1)
+
+    print("\n" + "=" * 50)
+    if success is None:
+        print("⏹️  Programme interrompu")
+    elif success:
+        print("✅ Programme terminé")
+    else:
+        print("❌ Programme terminé avec des erreurs")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+🐇 LAPIN - Rapport mémoire
+Mesure la mémoire d'un programme LAPIN et l'attribue aux variables,
+fonctions et lignes du programme
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def taille_profonde(valeur, vus=None):
+    """Taille en octets d'une valeur et de tout ce qu'elle contient"""
+    if vus is None:
+        vus = set()
+    if id(valeur) in vus:
+        return 0
+    vus.add(id(valeur))
+
+    taille = sys.getsizeof(valeur)
+    if isinstance(valeur, (list, tuple, set, frozenset)):
+        taille += sum(taille_profonde(v, vus) for v in valeur)
+    elif isinstance(valeur, dict):
+        taille += sum(taille_profonde(k, vus) + taille_profonde(v, vus) for k, v in valeur.items())
+    else:
+        # Instances de `structure` : champs dans des emplacements fixes
+        for champ in getattr(type(valeur), 'champs', ()):
+            taille += taille_profonde(getattr(valeur, champ, None), vus)
+    return taille
+
+
+def rss_max():
+    """Pic de mémoire résidente du processus en octets, ou None"""
+    if resource is None:
+        return None
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux compte en kilo-octets, macOS en octets
+    return pic if sys.platform == 'darwin' else pic * 1024
+
+
+class LapinMemoryProfiler:
+    """Suit la mémoire d'un `LapinInterpreter` via son accroche d'observation.
+
+    Entre deux lignes, la variation de la mémoire suivie par tracemalloc
+    (allocations moins libérations) est attribuée à la ligne LAPIN qui
+    vient de s'exécuter. Aux frontières de fonctions, la mémoire courante
+    et la copie des variables faite par `call_function` sont relevées.
+
+    Contrairement au débogueur, l'observateur ne désactive ni le cache des
+    fonctions pures ni les boucles parallèles : le programme mesuré est
+    celui qui tourne sans profileur.
+    """
+
+    def __init__(self, interpreter, top=10):
+        self.interpreter = interpreter
+        self.top = top
+        self.sources = {}
+        self.lignes = {}
+        self.fonctions = {}
+        self.pile = []
+        self.copies = 0
+        self.copies_max = 0
+        self.derniere_position = None
+        self.derniere_mesure = 0
+        self.debut = None
+        self.duree = 0.0
+        self.instantane = None
+        self.pic_trace = None
+        self.trace_demarree = False
+
+    def start(self):
+        # Un traçage déjà lancé par l'application hôte lui appartient
+        self.trace_demarree = not tracemalloc.is_tracing()
+        if self.trace_demarree:
+            tracemalloc.start()
+        self.debut = time.perf_counter()
+        self.derniere_mesure = tracemalloc.get_traced_memory()[0]
+        self.interpreter.observateur = self.on_event
+
+    def stop(self):
+        self._attribuer(tracemalloc.get_traced_memory()[0])
+        self.interpreter.observateur = None
+        self.duree = time.perf_counter() - self.debut
+        self.instantane = tracemalloc.take_snapshot()
+        self.pic_trace = tracemalloc.get_traced_memory()[1]
+        if self.trace_demarree:
+            tracemalloc.stop()
+            self.trace_demarree = False
+
+    def run(self, code, filename="<inline>"):
+        """Exécute un programme en mesurant sa mémoire"""
+        self.sources[filename] = code.split('\n')
+        self.start()
+        try:
+            return self.interpreter.execute(code, filename)
+        finally:
+            self.stop()
+
+    def _attribuer(self, mesure):
+        """Attribue la variation nette depuis la dernière mesure à la dernière ligne
+
+        Les libérations sont déduites : une ligne qui remplace une grosse
+        liste à chaque tour de boucle ne retient pas plus de mémoire que
+        la dernière liste.
+        """
+        variation = mesure - self.derniere_mesure
+        if variation and self.derniere_position is not None:
+            self.lignes[self.derniere_position] = self.lignes.get(self.derniere_position, 0) + variation
+        self.derniere_mesure = mesure
+
+    def on_event(self, event, info):
+        mesure = tracemalloc.get_traced_memory()[0]
+        self._attribuer(mesure)
+        interp = self.interpreter
+
+        if event == 'ligne':
+            self.derniere_position = (interp.current_file, info)
+        elif event == 'appel':
+            # call_function vient de copier le dictionnaire des variables
+            copie = sys.getsizeof(interp.variables)
+            self.copies += copie
+            self.copies_max = max(self.copies_max, self.copies)
+            self.pile.append((info, mesure, copie))
+        elif event == 'retour' and self.pile:
+            nom, entree, copie = self.pile.pop()
+            self.copies -= copie
+            stats = self.fonctions.setdefault(nom, {
+                'appels': 0,
+                'croissance_nette_max': 0,
+                'memoire_max': 0,
+            })
+            stats['appels'] += 1
+            stats['croissance_nette_max'] = max(stats['croissance_nette_max'], mesure - entree)
+            stats['memoire_max'] = max(stats['memoire_max'], mesure)
+
+    def source(self, fichier, ligne):
+        if fichier not in self.sources:
+            try:
+                with open(fichier, 'r', encoding='utf-8') as f:
+                    self.sources[fichier] = f.read().split('\n')
+            except (OSError, TypeError):
+                self.sources[fichier] = []
+        lignes = self.sources[fichier]
+        return lignes[ligne - 1].strip() if 0 < ligne <= len(lignes) else ''
+
+    def _lignes(self, variations):
+        return [
+            {
+                'fichier': fichier,
+                'ligne': ligne,
+                'source': self.source(fichier, ligne),
+                'octets': octets,
+            }
+            for (fichier, ligne), octets in variations[:self.top]
+        ]
+
+    def report(self):
+        """Rapport complet, sérialisable en JSON"""
+        interp = self.interpreter
+
+        variables = []
+        for nom, valeur in interp.variables.items():
+            entree = {
+                'nom': nom,
+                'type': type(valeur).__name__,
+                'taille_profonde': taille_profonde(valeur),
+            }
+            if isinstance(valeur, (list, tuple)):
+                entree['elements'] = len(valeur)
+            variables.append(entree)
+        variables.sort(key=lambda v: v['taille_profonde'], reverse=True)
+
+        # Variation nette par ligne : positive si la ligne garde de la mémoire,
+        # négative si elle libère ce que d'autres lignes avaient alloué
+        variations = sorted(self.lignes.items(), key=lambda item: item[1], reverse=True)
+        allocations = [item for item in variations if item[1] > 0]
+        liberations = [item for item in reversed(variations) if item[1] < 0]
+        python = self.instantane.statistics('lineno')[:self.top] if self.instantane else []
+
+        return {
+            'duree_s': round(self.duree, 6),
+            'rss_max_octets': rss_max(),
+            'tracemalloc_max_octets': self.pic_trace,
+            'etat': {
+                'variables': taille_profonde(interp.variables),
+                'sortie': taille_profonde(interp.output),
+                'fonctions': taille_profonde(interp.functions),
+                'cache': taille_profonde(interp.cache.entrees),
+                'copies_pile_max': self.copies_max,
+            },
+            'variables': variables,
+            'fonctions': [
+                dict(nom=nom, **stats)
+                for nom, stats in sorted(self.fonctions.items(),
+                                         key=lambda item: item[1]['croissance_nette_max'],
+                                         reverse=True)
+            ],
+            'plus_grosses_allocations': self._lignes(allocations),
+            'plus_grosses_liberations': self._lignes(liberations),
+            'python': [
+                {
+                    'site': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                    'octets': stat.size,
+                    'blocs': stat.count,
+                }
+                for stat in python
+            ],
+        }
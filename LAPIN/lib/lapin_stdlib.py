@@ -8,6 +8,8 @@ import random
 import time
 import os
 import sys
+from bisect import bisect_left
+from operator import attrgetter, itemgetter
 
 class LapinStdLib:
     """Fonctions standard pour LAPIN"""
@@ -73,6 +75,76 @@ class LapinStdLib:
             liste[index] = valeur
         return liste
 
+    @staticmethod
+    def trier(liste, cle=None, decroissant=False):
+        """Retourne une copie triée (tri stable)
+
+        `cle` peut être un indice (pour trier des listes de listes sur une
+        colonne), un nom de champ (pour trier des structures) ou une fonction
+        appliquée à chaque élément ; `faux` ou "" trient sur les éléments
+        eux-mêmes.
+        """
+        if isinstance(cle, bool) or cle == "":
+            cle = None
+        elif isinstance(cle, int):
+            cle = itemgetter(cle)
+        elif isinstance(cle, str):
+            cle = attrgetter(cle)
+        return sorted(liste, key=cle, reverse=bool(decroissant))
+
+    @staticmethod
+    def recherche_dichotomique(liste, valeur):
+        """Indice de `valeur` dans une liste triée, ou -1"""
+        index = bisect_left(liste, valeur)
+        if index < len(liste) and liste[index] == valeur:
+            return index
+        return -1
+
+    @staticmethod
+    def index_de(liste, valeur):
+        """Indice de la première occurrence de `valeur`, ou -1"""
+        try:
+            return liste.index(valeur)
+        except ValueError:
+            return -1
+
+    @staticmethod
+    def contient(liste, valeur):
+        """Vérifie si `valeur` est dans la liste"""
+        return valeur in liste
+
+    @staticmethod
+    def compter(liste, valeur):
+        """Nombre d'occurrences de `valeur`"""
+        return liste.count(valeur)
+
+    @staticmethod
+    def unique(liste):
+        """Éléments sans doublons, dans l'ordre de première apparition"""
+        try:
+            return list(dict.fromkeys(liste))
+        except TypeError:
+            # Éléments non hachables (listes de listes) : comparaison directe
+            resultat = []
+            for element in liste:
+                if element not in resultat:
+                    resultat.append(element)
+            return resultat
+
+    @staticmethod
+    def union(liste1, liste2):
+        """Éléments des deux listes, sans doublons"""
+        return LapinStdLib.unique(list(liste1) + list(liste2))
+
+    @staticmethod
+    def intersection(liste1, liste2):
+        """Éléments de la première liste présents dans la seconde, sans doublons"""
+        try:
+            presents = set(liste2)
+        except TypeError:
+            presents = list(liste2)
+        return LapinStdLib.unique([element for element in liste1 if element in presents])
+
     @staticmethod
     def nombre_aleatoire(min_val=0, max_val=1):
         """Retourne un nombre aléatoire"""
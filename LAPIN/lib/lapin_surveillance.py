@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+🐇 LAPIN - Mode surveillance
+Relance un programme à chaque modification de ses fichiers,
+en ne réanalysant que ce qui a changé
+"""
+
+import os
+import sys
+import time
+
+from lapin import CacheCode, LapinInterpreter
+
+
+class LapinWatcher:
+    """Surveille un programme et ses fichiers inclus par leur date de modification.
+
+    Le CacheCode est gardé d'une exécution à l'autre : seuls les fichiers
+    modifiés sont relus, et dans ces fichiers seules les fonctions
+    modifiées sont redécoupées.
+    """
+
+    def __init__(self, programme, cible=None, intervalle=0.3, sortie=None):
+        self.programme = programme
+        self.cible = cible or programme
+        self.intervalle = intervalle
+        self.sortie = sortie or sys.stdout
+        self.code = CacheCode(taille_max=float('inf'))
+        self.dates = {}
+
+    def dependencies(self, interpreter):
+        """Fichiers dont dépend la dernière exécution"""
+        fichiers = {self.programme, self.cible}
+        fichiers.update(interpreter.fichiers_inclus)
+        return fichiers
+
+    def run_once(self):
+        """Exécute la cible une fois ; retourne l'interpréteur utilisé"""
+        interpreter = LapinInterpreter(code=self.code)
+        interpreter.sortie = self.sortie
+
+        analyses = self.code.analyses
+        debut = time.perf_counter()
+        try:
+            lines = self.code.lire_fichier(self.cible)
+        except OSError as e:
+            print(f"❌ Lecture impossible de '{self.cible}': {e}")
+            return interpreter
+        succes = interpreter.execute(lines, self.cible)
+        duree = (time.perf_counter() - debut) * 1000
+
+        statut = "✅ Exécuté" if succes else "❌ Erreurs"
+        print(f"{statut} en {duree:.1f} ms ({self.code.analyses - analyses} blocs réanalysés)")
+        return interpreter
+
+    def snapshot(self, fichiers):
+        dates = {}
+        for fichier in fichiers:
+            try:
+                dates[fichier] = os.path.getmtime(fichier)
+            except OSError:
+                dates[fichier] = None
+        return dates
+
+    def wait_for_change(self):
+        """Attend qu'un fichier surveillé change ; retourne les fichiers modifiés"""
+        while True:
+            time.sleep(self.intervalle)
+            actuelles = self.snapshot(self.dates)
+            modifies = [f for f, date in actuelles.items() if date != self.dates[f]]
+            if modifies:
+                return modifies
+
+    def watch(self):
+        """Boucle principale : exécuter, attendre une modification, recommencer"""
+        print(f"👀 Surveillance de {self.programme} (Ctrl+C pour arrêter)")
+        try:
+            while True:
+                print("=" * 50)
+                interpreter = self.run_once()
+                self.dates = self.snapshot(self.dependencies(interpreter))
+                modifies = self.wait_for_change()
+                print(f"\n🔄 Modifié: {', '.join(sorted(modifies))}")
+        except KeyboardInterrupt:
+            print("\nAu revoir ! 👋")